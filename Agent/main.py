@@ -7,6 +7,14 @@ import subprocess
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))  # Adds GringoOps root to PYTHONPATH
+from lib.ollama_client import stream_generate
+from lib.single_flight import coalesced_stream
+from lib.summarizer import reduce_log
+from lib.warm_pool import get_warm_pool
+from lib.llm_metrics import start_metrics_server
+from lib.cascade import cascade_generate, cascade_stats, infer_expect, DEFAULT_TIERS as CASCADE_TIERS
+from lib.stream_render import render_stream
+from lib.memory_store import get_memory_store
 
 # --- MemoryManager import and instantiation moved to top for global availability ---
 try:
@@ -19,7 +27,10 @@ except ImportError:
             print("[Memory] Saved")
 
 try:
-    memory = MemoryManager()
+    # One manager per browser session, so its session id survives reruns
+    if "memory_manager" not in st.session_state:
+        st.session_state.memory_manager = MemoryManager()
+    memory = st.session_state.memory_manager
 except Exception as mem_init_err:
     print(f"[MemoryManager Instantiation Failed] {mem_init_err}")
     class DummyMemory:
@@ -30,7 +41,21 @@ except Exception as mem_init_err:
     memory = DummyMemory()
 
 
+def log_on_change(key, event, data=None):
+    """
+    Logs a top-level event once per session, then again only when its data changes.
+    Streamlit reruns this script on every interaction, so unguarded calls here
+    would write the same row to the memory store each time.
+    """
+    logged = st.session_state.setdefault("logged_events", {})
+    if key in logged and logged[key] == data:
+        return
+    logged[key] = data
+    memory.log_event(event, data)
+
+
 st.set_page_config(page_title="GringoOps Repair Dashboard", layout="wide")
+start_metrics_server()  # Prometheus /metrics for model calls, once per process
 
 # --- Mission file loading, offline fallback ---
 mission_path = "FredFix/core/mission.json"
@@ -39,16 +64,16 @@ if not os.path.exists(mission_path):
     os.makedirs(os.path.dirname(mission_path), exist_ok=True)
     with open(mission_path, "w") as mf:
         json.dump({"mission": "Define your GringoOps mission here."}, mf, indent=2)
-    memory.log_event("Mission file auto-created", {"path": mission_path})
+    log_on_change("mission_created", "Mission file auto-created", {"path": mission_path})
 
 try:
     with open(mission_path) as mf:
         mission_data = json.load(mf)
-        memory.log_event("Mission loaded", mission_data)
+        log_on_change("mission", "Mission loaded", mission_data)
         st.session_state["mission_data"] = mission_data
 except Exception as e:
     st.warning("⚠️ Could not load mission.json")
-    memory.log_event("Mission load failed", {"error": str(e)})
+    log_on_change("mission", "Mission load failed", {"error": str(e)})
 
 # Load last session's selected chain if exists
 try:
@@ -61,22 +86,51 @@ except Exception:
 st.sidebar.markdown("## ⚙️ Global Settings")
 # Open Source Only: restrict model dropdown
 available_models = ["mistral", "codellama", "llama2", "phi", "tinyllama"]
-global_model = st.sidebar.selectbox("🧠 Default Model", available_models, key="global_model_selector")
-
-def stream_model_response(prompt: str, model: str = None):
+# "cascade" tries the small models first and escalates to a larger one only when needed
+cascade_option = ["cascade"] if CASCADE_TIERS else []
+global_model = st.sidebar.selectbox("🧠 Default Model", available_models + cascade_option, key="global_model_selector")
+
+# Preload the selected model at startup and keep used models resident (pool is process-wide,
+# started once); OLLAMA_WARM_MODELS preloads a wider set on boxes with the RAM for it
+default_warm = CASCADE_TIERS[0] if global_model == "cascade" else global_model
+warm_models = os.getenv("OLLAMA_WARM_MODELS", default_warm).split(",")
+warm_pool = get_warm_pool([m.strip() for m in warm_models if m.strip()])
+with st.sidebar.expander("🔥 Warm Models"):
+    for warm_model, is_warm in warm_pool.status().items():
+        st.markdown(f"{'🟢' if is_warm else '⚪'} `{warm_model}`")
+with st.sidebar.expander("🪜 Cascade Tiers"):
+    stats = cascade_stats()
+    st.markdown(f"Requests: {stats['requests']}")
+    for tier_model in CASCADE_TIERS:
+        st.markdown(f"`{tier_model}` — served {stats['hit_rate'].get(tier_model, 0):.0%}, "
+                    f"escalated {stats['escalations'].get(tier_model, 0)}")
+with st.sidebar.expander("🗄️ Memory Store"):
+    memory_agent = st.text_input("Agent", value="FredFix", key="memory_store_agent")
+    memory_event = st.text_input("Event (optional)", key="memory_store_event")
+    # Indexed latest-N lookup instead of parsing the history files
+    for record in reversed(get_memory_store().latest(10, agent=memory_agent or None, event=memory_event or None)):
+        st.markdown(f"**{record['timestamp']}** — `{record['event']}` ({record['agent']})")
+
+def stream_model_tokens(prompt: str, model: str = None):
     if model is None:
         model = st.session_state.get("global_model_selector", "mistral")
-    from subprocess import Popen, PIPE
+    if model == "cascade":
+        # The cascade has to score a full answer before deciding, so it can't stream token by token
+        yield cascade_generate(prompt, expect=infer_expect(prompt))["output"]
+        return
     # Only allow open source models
     assert model in available_models, "Only open source models allowed"
-    process = Popen(["ollama", "run", model], stdin=PIPE, stdout=PIPE, stderr=PIPE, text=True, bufsize=1)
-    process.stdin.write(prompt)
-    process.stdin.close()
-    for line in iter(process.stdout.readline, ''):
-        yield line.strip()
+    warm_pool.touch(model)
+    # Tokens arrive from the pooled Ollama client.
+    # Identical prompts from other sessions share one upstream stream.
+    yield from coalesced_stream(("ollama", model, prompt), lambda: stream_generate(prompt, model=model))
+
+def render_model_stream(prompt: str, model: str, render) -> str:
+    """Streams the response into a Streamlit element, redrawing on a throttled cadence."""
+    return render_stream(stream_model_tokens(prompt, model), render).strip()
 
 try:
-    memory.log_event("GringoOps AI Repair Dashboard launched")
+    log_on_change("launched", "GringoOps AI Repair Dashboard launched")
 except Exception as mem_err:
     print(f"[Memory Logging Failed] {mem_err}")
 from FredFix.core.agent import run_agent
@@ -128,7 +182,7 @@ st.sidebar.markdown(f"Current agent: **{agent_choice}**")
 st.sidebar.markdown(f"📌 Persisted agent: **{st.session_state.get('selected_agent', 'None')}**")
 st.sidebar.markdown("🔀 Automatically switch chains based on context")
 auto_switch_enabled = st.sidebar.checkbox("Enable Chain Switching", value=True)
-memory.log_event("Agent selected", {"agent": agent_choice})
+log_on_change("agent", "Agent selected", {"agent": agent_choice})
 
 # Mission context in sidebar
 if "mission_data" in st.session_state:
@@ -350,7 +404,7 @@ with st.expander("🧠 Run Agent Chain"):
             manual_input = st.text_area("✍️ Optional Input (replaces {input})", placeholder="Paste content or leave blank...")
 
             available_models = ["mistral", "codellama", "llama2", "phi", "tinyllama"]
-            selected_model = st.selectbox("🧠 Override model for all steps (optional)", ["(keep per-step model)"] + available_models)
+            selected_model = st.selectbox("🧠 Override model for all steps (optional)", ["(keep per-step model)"] + available_models + cascade_option)
 
             # --- Enhancement 3: Real-time logging and status tracking ---
             if st.button("🚀 Run Chain Now"):
@@ -377,6 +431,13 @@ with st.expander("🧠 Run Agent Chain"):
                         log_area = st.empty()
                         log_text = ""
 
+                        # Mission context is passed as a shared prefix so the local model evaluates it once per run;
+                        # sorted keys keep its text, and so the cached tokens, identical from step to step
+                        mission_prefix = None
+                        if "mission_data" in st.session_state:
+                            mission_summary = json.dumps(st.session_state["mission_data"], sort_keys=True)
+                            mission_prefix = f"[PROJECT MISSION CONTEXT]\n{mission_summary}"
+
                         for step in steps:
                             if selected_model != "(keep per-step model)":
                                 step["model"] = selected_model
@@ -387,11 +448,6 @@ with st.expander("🧠 Run Agent Chain"):
                                     if placeholder in step["prompt"]:
                                         step["prompt"] = step["prompt"].replace(placeholder, str(memory_dict[key]))
 
-                            # --- Inject mission context if available ---
-                            if "mission_data" in st.session_state:
-                                mission_summary = json.dumps(st.session_state["mission_data"])
-                                step["prompt"] = f"[PROJECT MISSION CONTEXT]\n{mission_summary}\n\n" + step["prompt"]
-
                             # Tool execution support
                             if "tool" in step:
                                 tool_path = os.path.join(TOOL_DIR, step["tool"])
@@ -435,7 +491,8 @@ with st.expander("🧠 Run Agent Chain"):
                                 prompt = prompt.replace("{input}", manual_input if manual_input.strip() != "" else "10")
                             # Use live model override
                             model = step.get("model", st.session_state.get("global_model_selector", "mistral"))
-                            agent_output = agent_runner(prompt, model=model)
+                            # Steps can declare "expect": "code" / "json"; otherwise it is inferred from the prompt
+                            agent_output = agent_runner(prompt, model=model, prefix=mission_prefix, expect=step.get("expect"))
                             log_text += f"--- Step: {step.get('name','Unnamed')} ---\n{agent_output}\n"
                             append_to_chain_log(log_text)
                             log_area.text(log_text[-2000:])
@@ -512,7 +569,7 @@ with st.expander("🧠 Run Agent Chain"):
                             if "error" in agent_output.lower() or "exception" in agent_output.lower():
                                 memory.log_event("Detected potential failure, attempting recovery")
                                 retry_prompt = f"Try to recover from this error:\n\n{agent_output}"
-                                retry_output = agent_runner(retry_prompt, model=model)
+                                retry_output = agent_runner(retry_prompt, model=model, prefix=mission_prefix)
                                 log_text += f"\n--- Recovery Attempt ---\n{retry_output}\n"
                                 append_to_chain_log(f"--- Recovery Attempt ---\n{retry_output}")
                                 log_area.text(log_text[-2000:])
@@ -591,16 +648,20 @@ with st.expander("🧠 Memory Log Viewer"):
                             daily_counts = chain_events.groupby(chain_events["timestamp"].dt.date)["count"].count()
                             st.bar_chart(daily_counts)
 
+                    # Full log, oldest first, so chunk summaries stay cacheable as new entries arrive
+                    def condense_memory_log(model):
+                        records = json.loads(df.sort_values(by="timestamp").to_json(orient="records"))
+                        with st.spinner(f"Condensing {len(records)} log entries..."):
+                            return reduce_log(records, model=CASCADE_TIERS[-1] if model == "cascade" else model)
+
                     # Added smart memory summarizer
                     if st.button("🧠 Summarize Memory Log with Local Agent"):
                         try:
-                            summary_prompt = f"Summarize the following agent memory log in 5 bullet points:\n\n{df.to_json(orient='records')[:8000]}"
-                            stream_placeholder = st.empty()
-                            streamed_output = ""
                             model = st.session_state.get("global_model_selector", "mistral")
-                            for chunk in stream_model_response(summary_prompt, model=model):
-                                streamed_output += chunk + " "
-                                stream_placeholder.text_area("📝 Summary", value=streamed_output.strip(), height=200)
+                            summary_prompt = f"Summarize the following agent memory log in 5 bullet points:\n\n{condense_memory_log(model)}"
+                            stream_placeholder = st.empty()
+                            render_model_stream(summary_prompt, model,
+                                                lambda text: stream_placeholder.text_area("📝 Summary", value=text, height=200))
                             memory.log_event("Generated memory summary")
                         except Exception as e:
                             st.error(f"Failed to summarize: {e}")
@@ -608,12 +669,10 @@ with st.expander("🧠 Memory Log Viewer"):
                     # Memory boosting from log
                     if st.button("📥 Boost Agent Memory from Log"):
                         try:
-                            boost_prompt = f"Act as an AI assistant enhancing its long-term memory. Parse and retain useful information from this log:\n\n{df.to_json(orient='records')[:8000]}"
-                            streamed_output = ""
                             model = st.session_state.get("global_model_selector", "mistral")
-                            for chunk in stream_model_response(boost_prompt, model=model):
-                                st.text(chunk.strip())
-                                streamed_output += chunk + " "
+                            boost_prompt = f"Act as an AI assistant enhancing its long-term memory. Parse and retain useful information from this log:\n\n{condense_memory_log(model)}"
+                            boost_placeholder = st.empty()
+                            streamed_output = render_model_stream(boost_prompt, model, boost_placeholder.text)
                             memory.log_event("Boosted agent memory from logs", {"model_used": model})
                             # --- Enhancement: Update agent_memory.json with boosted insights ---
                             try:
@@ -635,8 +694,8 @@ with st.expander("🧠 Memory Log Viewer"):
                         try:
                             test_prompt = "What chains or tools have I recently used?"
                             model = st.session_state.get("global_model_selector", "mistral")
-                            for chunk in stream_model_response(test_prompt, model=model):
-                                st.text(chunk.strip())
+                            recall_placeholder = st.empty()
+                            render_model_stream(test_prompt, model, recall_placeholder.text)
                             memory.log_event("Memory recall test")
                         except Exception as e:
                             st.error(f"Failed to test memory: {e}")
@@ -4,7 +4,10 @@ from FredFix.core.memory_manager import MemoryManager
 
 st.set_page_config(page_title="🚄 Bullet Train Launcher", layout="wide")
 
-memory = MemoryManager()
+# One manager per browser session, so its session id survives reruns
+if "memory_manager" not in st.session_state:
+    st.session_state.memory_manager = MemoryManager("BulletTrain")
+memory = st.session_state.memory_manager
 
 st.title("🚄 GringoOps Bullet Train")
 st.markdown("Launch rapid-fire automation tools and diagnostics here.")
@@ -1,6 +1,13 @@
 import subprocess
 import os
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # Adds GringoOps root to PYTHONPATH
+from lib.dual_review import arbitrate, dual_review
 AUTO_RESOLVE_MODEL = os.getenv("DEFAULT_AI_MODEL", "").lower()
+# Score disagreements automatically instead of prompting. Off unless set; without a
+# terminal to ask, disagreements are skipped rather than arbitrated.
+AUTO_ARBITRATE = os.getenv("CHATTERFIX_AUTO_ARBITRATE", "0") == "1"
 
 def get_key(service: str) -> str:
     result = subprocess.run(
@@ -22,11 +29,24 @@ print("✅ API keys loaded from macOS Keychain.")
 
 
 # Helper: prompt user to resolve model disagreement
-def resolve_conflict(openai_output, gemini_output):
+def resolve_conflict(openai_output, gemini_output, decision=None):
     if AUTO_RESOLVE_MODEL in ['o', 'g']:
         print(f"\n⚙️ AUTO-RESOLVE ENABLED: Using {'OpenAI' if AUTO_RESOLVE_MODEL == 'o' else 'Gemini'} by default.")
         return AUTO_RESOLVE_MODEL
 
+    decision = decision or arbitrate(openai_output, gemini_output)
+    if decision["reason"] != "scored":
+        print(f"\n⚙️ No conflict to resolve ({decision['reason']}).")
+        return decision["choice"]
+    if AUTO_ARBITRATE:
+        print(f"\n⚙️ AUTO-ARBITRATE: Using {'OpenAI' if decision['choice'] == 'o' else 'Gemini'} (scores: {decision['scores']}).")
+        return decision["choice"]
+    # sys.stdin is None under pythonw and some service launches
+    if sys.stdin is None or not sys.stdin.isatty():
+        print("\n⚙️ Models disagreed and there's no terminal to ask; skipping both "
+              "(set CHATTERFIX_AUTO_ARBITRATE=1 to use the higher-scored answer).")
+        return "s"
+
     print("\n🤖 Models disagreed. Here's what each said:")
     print("\n--- OpenAI Suggestion ---\n")
     print(openai_output)
@@ -42,4 +62,14 @@ def resolve_conflict(openai_output, gemini_output):
         if choice in ['o', 'g', 's']:
             return choice
         else:
-            print("Invalid choice. Please enter 'o', 'g', or 's'.")
\ No newline at end of file
+            print("Invalid choice. Please enter 'o', 'g', or 's'.")
+
+
+# Runs OpenAI and Gemini concurrently on the same prompt and resolves any disagreement
+def review_with_both_models(prompt):
+    decision = dual_review(prompt)
+    outputs = decision["outputs"]
+    if decision["reason"] == "scored":
+        decision["choice"] = resolve_conflict(outputs["openai"], outputs["gemini"], decision)
+        decision["output"] = {"o": outputs["openai"], "g": outputs["gemini"]}.get(decision["choice"])
+    return decision
@@ -1,8 +1,11 @@
 import os
-import json
 from datetime import datetime
 import platform
 import socket
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # Adds GringoOps root to PYTHONPATH
+from lib.event_log import open_event_log
 
 session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 memory_path = os.path.expanduser("~/Projects/GringoOps/shared_memory.json")
@@ -16,14 +19,8 @@ def log_event(event_type, data):
         "host": socket.gethostname(),
         "app": "ChatterFix"
     }
-    if os.path.exists(memory_path):
-        with open(memory_path, "r") as f:
-            history = json.load(f)
-    else:
-        history = []
-    history.append(log)
-    with open(memory_path, "w") as f:
-        json.dump(history, f, indent=2)
+    # O(1) append; the old JSON array is converted to the event log on first use
+    open_event_log(memory_path).append(log)
 
 # Log app startup event
 log_event("App started", {"status": "ChatterFix launched"})
\ No newline at end of file
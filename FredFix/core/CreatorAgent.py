@@ -1,13 +1,10 @@
 import os
-from google.cloud import secretmanager
 from datetime import datetime
-
-try:
-    import openai
-    from openai import OpenAI
-    _new_sdk = True
-except ImportError:
-    _new_sdk = False
+from lib.llm_cache import cached_call
+from lib.resilience import call_with_resilience
+from lib.llm_metrics import track_call
+from lib.cassette import cassette_call
+from lib.clients import get_openai_client
 
 class CreatorAgent:
     def __init__(self, model="gpt-4", temperature=0.7, base_path=None):
@@ -18,39 +15,41 @@ class CreatorAgent:
             "to enhance productivity, automation, and intelligence for the FredFix platform."
         )
         self.base_path = base_path or os.path.dirname(__file__)
-
-        if _new_sdk:
-            self.client = OpenAI()
-        else:
-            self._load_api_key_from_secret_manager()
+        # OPENAI_API_KEY when set, otherwise the key kept in Secret Manager
+        self.client = get_openai_client(os.getenv("OPENAI_API_KEY") or self._load_api_key_from_secret_manager())
 
     def _load_api_key_from_secret_manager(self, secret_id="projects/487771372565/secrets/openai_api_key"):
+        from google.cloud import secretmanager
         client = secretmanager.SecretManagerServiceClient()
         name = f"{secret_id}/versions/latest"
         response = client.access_secret_version(request={"name": name})
-        api_key = response.payload.data.decode("UTF-8")
-        openai.api_key = api_key
+        return response.payload.data.decode("UTF-8")
+
+    def create_module(self, prompt, use_cache=True):
+        return cached_call(
+            "openai", self.model, self.temperature, f"{self.system_prompt}\n\n{prompt}",
+            lambda: call_with_resilience("openai", lambda: self._complete(prompt)),
+            use_cache=use_cache
+        )
+
+    def _complete(self, prompt):
+        with track_call("openai", self.model, prompt) as call:
+            request = {"model": self.model, "temperature": self.temperature, "system": self.system_prompt, "prompt": prompt}
+            call["completion"] = cassette_call("openai", request, lambda: self._request(prompt))
+        return call["completion"]
 
-    def create_module(self, prompt):
+    def _request(self, prompt):
         messages = [
             {"role": "system", "content": self.system_prompt},
             {"role": "user", "content": prompt}
         ]
 
-        if _new_sdk:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature
-            )
-            return response.choices[0].message.content
-        else:
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature
-            )
-            return response.choices[0]['message']['content']
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature
+        )
+        return response.choices[0].message.content
 
     def save_module(self, filename, content):
         if not filename.endswith(".py"):
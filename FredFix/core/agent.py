@@ -1,22 +1,49 @@
-# Import OpenAI (optional) and subprocess for local model execution
-import subprocess
-# core/memory.py
-
+# Import OpenAI (optional) and the shared Ollama client for local model execution
+import os
+import sys
 import json
+import tempfile
+import threading
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # Adds GringoOps root to PYTHONPATH
+from lib.ollama_client import generate as ollama_generate, stream_generate
+from lib.llm_cache import cached_call
+from lib.single_flight import coalesced_call
+from lib.hedging import hedged_stream_call
+from lib.clients import get_openai_client
+from lib.llm_providers import get_provider
+from lib.llm_metrics import track_call, track_stream
+from lib.cascade import cascade_generate, infer_expect
+from lib.warm_pool import touch as touch_warm_model
+from lib.cassette import cassette_call, cassette_stream
+from lib.memory_store import get_memory_store
+
+# core/memory.py
 
 MEMORY_FILE = Path(__file__).parent / "agent_memory.json"
+_memory_lock = threading.Lock()
 
 def load_memory():
     if MEMORY_FILE.exists():
         with open(MEMORY_FILE, "r") as f:
-            return json.load(f)
+            text = f.read()
+        if text.strip():
+            # Older versions appended JSON lines after the dict; the next save drops them
+            return json.JSONDecoder().raw_decode(text.lstrip())[0]
     return {}
 
 def save_memory(memory):
-    with open(MEMORY_FILE, "w") as f:
-        json.dump(memory, f, indent=2)
+    # Write a temp file and swap it in, so concurrent load_memory calls never see a half-written file
+    with _memory_lock:
+        fd, tmp = tempfile.mkstemp(dir=MEMORY_FILE.parent, prefix=MEMORY_FILE.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(memory, f, indent=2)
+            os.replace(tmp, MEMORY_FILE)
+        except BaseException:
+            os.unlink(tmp)
+            raise
 
 # core/repair_engine.py
 
@@ -50,6 +77,20 @@ class FredFixAgent:
         self.memory = load_memory()
         self.config = AgentConfig()
 
+    def _remember(self, command, result, mode, model=None):
+        """Saves the exchange to agent_memory.json and the indexed memory store; returns its timestamp."""
+        self.memory.setdefault("history", []).append({
+            "command": command,
+            "result": result
+        })
+        save_memory(self.memory)
+        # Timestamped exchanges go to the memory store (agent_memory.json used to
+        # get JSON lines appended after the dict, which broke load_memory)
+        timestamp = datetime.now(timezone.utc).isoformat()
+        get_memory_store().record(mode, {"command": command, "result": result, "model": model},
+                                  agent=self.config.agent_name, timestamp=timestamp)
+        return timestamp
+
     def run(self, command: str):
         print(f"[DEBUG] Running command: {command}")
         print(f"[DEBUG] Current memory before execution: {self.memory}")
@@ -59,21 +100,10 @@ class FredFixAgent:
             else:
                 result = execute_command(command, self.memory)
 
-            # Update memory with the command and result
-            self.memory.setdefault("history", []).append({
-                "command": command,
-                "result": result
-            })
-
-            save_memory(self.memory)
-            memory_line = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "command": command,
-                "result": result
-            }
-            log_path = Path(__file__).parent / "agent_memory.json"
-            with open(log_path, "a") as mem_log:
-                mem_log.write(json.dumps(memory_line) + "\n")
+            # Update memory with the command and result; run_agent probes every
+            # prompt here first, so unknown commands aren't worth a record
+            if "Unknown command" not in result:
+                self._remember(command, result, "command")
             print(f"[DEBUG] Memory after execution: {self.memory}")
             print(f"[DEBUG] Command result: {result}")
             return result
@@ -81,7 +111,36 @@ class FredFixAgent:
             print(f"[ERROR] Exception during command execution: {e}")
             raise
 
-    def run_agent(self, input_text: str, model: str = None):
+    def _openai_client(self):
+        # The v1 SDK has no api_key_path; .openai_key.txt still wins over env/Keychain when present
+        key_file = Path(".openai_key.txt")
+        api_key = key_file.read_text().strip() if key_file.exists() else get_provider("openai").key
+        return get_openai_client(api_key)
+
+    def _openai_stream(self, input_text: str, system_prompt: str = "You are FredFix, an AI assistant."):
+        def live_stream():
+            response = self._openai_client().chat.completions.create(
+                model=self.config.openai_model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": input_text}
+                ],
+                stream=True
+            )
+            try:
+                for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                # Closing early (a lost hedge) drops the HTTP response instead of draining it
+                response.close()
+
+        request = {"model": self.config.openai_model, "system": system_prompt, "prompt": input_text, "stream": True}
+        yield from track_stream("openai", self.config.openai_model, input_text,
+                                cassette_stream("openai", request, live_stream))
+
+    def run_agent(self, input_text: str, model: str = None, use_cache: bool = True, hedge: bool = False,
+                  prefix: str = None, expect: str = None):
         # Try running as known command first
         known_result = self.run(input_text)
         if "Unknown command" not in known_result:
@@ -94,67 +153,79 @@ class FredFixAgent:
         # Otherwise, treat as natural language prompt
         try:
             # Try local model with Ollama first
-            prompt = f"You are FredFix, an AI assistant.\n\nUser: {input_text}"
+            system_prompt = "You are FredFix, an AI assistant."
+            if prefix:
+                system_prompt = f"{system_prompt}\n\n{prefix}"
+            prompt = f"{system_prompt}\n\nUser: {input_text}"
+            # A shared prefix (e.g. chain mission context) goes in Ollama's system slot, so every
+            # step starts with the same tokens and the runner reuses them from its KV cache
+            local_prompt = input_text if prefix else prompt
+            local_kwargs = {"system": system_prompt} if prefix else {}
             # If model is passed (e.g., "llama2", "codellama"), it overrides the default
             selected_model = model or "mistral"
-            result = subprocess.run(["ollama", "run", selected_model], input=prompt, text=True, capture_output=True)
-            ai_result = result.stdout.strip()
+            if selected_model != "cascade":
+                # Keeps chain and agent use in the dashboard warm pool's LRU order
+                touch_warm_model(selected_model)
+            mode = "local_model"
+            if selected_model == "cascade":
+                # Small models answer first; escalate only when their answer looks weak.
+                # Code/fix and JSON prompts must parse before a small model's answer is kept.
+                expect = expect or infer_expect(input_text)
+                ai_result = cached_call(
+                    "ollama", f"cascade:{expect}" if expect else "cascade", None, prompt,
+                    lambda: coalesced_call(("cascade", expect, prompt),
+                                           lambda: cascade_generate(prompt, expect=expect)["output"]),
+                    use_cache=use_cache
+                )
+            elif hedge:
+                # Race OpenAI against the local model when the local box is slow to answer
+                winner, ai_result = hedged_stream_call([
+                    ("local", lambda cancel: stream_generate(local_prompt, model=selected_model,
+                                                             cancel=cancel, **local_kwargs)),
+                    ("openai", lambda cancel: self._openai_stream(input_text, system_prompt)),
+                ])
+                ai_result = ai_result.strip()
+                mode = "local_model" if winner == "local" else "openai_hedge"
+            else:
+                ai_result = cached_call(
+                    "ollama", selected_model, None, prompt,
+                    lambda: coalesced_call(("ollama", selected_model, prompt),
+                                           lambda: ollama_generate(local_prompt, model=selected_model, **local_kwargs)),
+                    use_cache=use_cache
+                )
 
             # Save to memory
-            self.memory.setdefault("history", []).append({
-                "command": input_text,
-                "result": ai_result
-            })
-            save_memory(self.memory)
-
-            memory_line = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "command": input_text,
-                "result": ai_result
-            }
-            log_path = Path(__file__).parent / "agent_memory.json"
-            with open(log_path, "a") as mem_log:
-                mem_log.write(json.dumps(memory_line) + "\n")
+            timestamp = self._remember(input_text, ai_result, mode, model=selected_model)
 
             return {
-                "mode": "local_model",
+                "mode": mode,
                 "output": ai_result,
-                "timestamp": memory_line["timestamp"]
+                "timestamp": timestamp
             }
 
         except Exception:
             try:
                 # Fallback to OpenAI if local fails
-                import openai
-                openai.api_key_path = ".openai_key.txt"
-                response = openai.ChatCompletion.create(
-                    model=self.config.openai_model,
-                    messages=[
-                        {"role": "system", "content": "You are FredFix, an AI assistant."},
-                        {"role": "user", "content": input_text}
-                    ]
-                )
-                ai_result = response.choices[0].message.content.strip()
-
-                self.memory.setdefault("history", []).append({
-                    "command": input_text,
-                    "result": ai_result
-                })
-                save_memory(self.memory)
-
-                memory_line = {
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "command": input_text,
-                    "result": ai_result
-                }
-                log_path = Path(__file__).parent / "agent_memory.json"
-                with open(log_path, "a") as mem_log:
-                    mem_log.write(json.dumps(memory_line) + "\n")
+                def request():
+                    response = self._openai_client().chat.completions.create(
+                        model=self.config.openai_model,
+                        messages=[
+                            {"role": "system", "content": "You are FredFix, an AI assistant."},
+                            {"role": "user", "content": input_text}
+                        ]
+                    )
+                    return response.choices[0].message.content
+
+                with track_call("openai", self.config.openai_model, input_text) as call:
+                    call["completion"] = cassette_call("openai", {"model": self.config.openai_model, "prompt": input_text}, request)
+                ai_result = call["completion"].strip()
+
+                timestamp = self._remember(input_text, ai_result, "openai_fallback", model=self.config.openai_model)
 
                 return {
                     "mode": "openai_fallback",
                     "output": ai_result,
-                    "timestamp": memory_line["timestamp"]
+                    "timestamp": timestamp
                 }
             except Exception as fallback_error:
                 return {
@@ -184,7 +255,8 @@ if __name__ == "__main__":
         print(f"❌ FredFix encountered an error: {e}")
 
 # Exportable run_agent function for dashboard use
-def run_agent(input_text: str, model: str = None):
-    return FredFixAgent().run_agent(input_text, model)
+def run_agent(input_text: str, model: str = None, use_cache: bool = True, hedge: bool = False, prefix: str = None,
+              expect: str = None):
+    return FredFixAgent().run_agent(input_text, model, use_cache=use_cache, hedge=hedge, prefix=prefix, expect=expect)
 
 __all__ = ["FredFixAgent", "run_agent"]
\ No newline at end of file
@@ -20,6 +20,11 @@ st.sidebar.markdown("⬅️ [Back to Dashboard](gringoops_dashboard.py)")
 os.makedirs("logs", exist_ok=True)
 log_path = "logs/creator_agent_history.log"
 
+@st.cache_resource
+def get_creator_agent():
+    # One agent (and one OpenAI client) for the whole server, not one per submit
+    return CreatorAgent()
+
 st.title("🧠 CreatorAgent Interface")
 
 current_dir = os.path.dirname(__file__)
@@ -47,7 +52,7 @@ with tabs[0]:  # 📥 Prompt Builder
         submitted = st.form_submit_button("Generate & Save")
 
     if submitted and prompt and filename:
-        agent = CreatorAgent()
+        agent = get_creator_agent()
         with st.spinner("🧠 Generating code..."):
             code = agent.create_module(prompt)
             path = agent.save_module(filename, code)
@@ -1,11 +1,20 @@
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))  # Adds GringoOps to sys.path
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # Adds GringoOps root for lib/
 import os
+import re
+import json
 import datetime
+import threading
+from lib.memory_store import get_memory_store, to_utc
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 MEMORY_DIR = str(BASE_DIR / "memory_logs")
+ENTRY_SEPARATOR = "=" * 40
+ENTRY_HEADER = re.compile(r"^\[(?P<timestamp>[^\]]+)\] ✅=(?P<verified>True|False)$")
+_imported_agents = set()
+_import_lock = threading.Lock()
 
 def get_memory_path(agent_name: str) -> str:
     os.makedirs(MEMORY_DIR, exist_ok=True)
@@ -14,11 +23,59 @@ def get_memory_path(agent_name: str) -> str:
 def save_memory(agent_name: str, user_input: str, agent_output: str, metadata: dict = None, verified: bool = False):
     memory_path = get_memory_path(agent_name)
     print(f"[MemoryManager] Writing to {memory_path}")
-    timestamp = datetime.datetime.now().isoformat()
+    timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
     meta_block = "\n".join([f"{k}: {v}" for k, v in (metadata or {}).items()])
-    log_entry = f"[{timestamp}] ✅={verified}\nUser: {user_input}\nAgent: {agent_output}\n{meta_block}\n{'='*40}\n"
+    log_entry = f"[{timestamp}] ✅={verified}\nUser: {user_input}\nAgent: {agent_output}\n{meta_block}\n{ENTRY_SEPARATOR}\n"
     with open(memory_path, "a", encoding="utf-8") as f:
         f.write(log_entry)
+    # Indexed copy for lookups; the text file stays as the human-readable log
+    get_memory_store().record(
+        (metadata or {}).get("event", "memory"),
+        {"input": user_input, "output": agent_output, "metadata": metadata or {}, "verified": verified},
+        agent=agent_name, timestamp=timestamp
+    )
+
+def _parse_text_log(memory_path):
+    """Yields (timestamp, verified, user_input, agent_output) from an agent's text log."""
+    with open(memory_path, "r", encoding="utf-8") as f:
+        blocks = f.read().split(ENTRY_SEPARATOR)
+    for block in blocks:
+        header, _, body = block.strip().partition("\n")
+        match = ENTRY_HEADER.match(header)
+        if not match or not body.startswith("User: "):
+            continue
+        user_input, _, agent_output = body[len("User: "):].partition("\nAgent: ")
+        yield match["timestamp"], match["verified"] == "True", user_input, agent_output.strip()
+
+def _import_text_log(agent_name: str):
+    """
+    Copies entries written before the memory store existed into it, once per
+    agent, so store lookups see the whole history. Later entries are already in
+    the store because save_memory writes to both.
+    """
+    with _import_lock:
+        if agent_name in _imported_agents:
+            return
+        memory_path = get_memory_path(agent_name)
+        marker = memory_path + ".imported"
+        if os.path.exists(memory_path) and not os.path.exists(marker):
+            store = get_memory_store()
+            first = store.query(agent=agent_name, limit=1)
+            cutoff = first[0]["timestamp"] if first else None
+            rows = [
+                (timestamp, "memory", agent_name, None,
+                 {"input": user_input, "output": agent_output, "metadata": {}, "verified": verified})
+                for timestamp, verified, user_input, agent_output in _parse_text_log(memory_path)
+            ]
+            store.record_many(row for row in rows if cutoff is None or to_utc(row[0]) < cutoff)
+            with open(marker, "w") as f:
+                f.write(datetime.datetime.now(datetime.timezone.utc).isoformat())
+        _imported_agents.add(agent_name)
+
+def _format_entry(record) -> str:
+    data = record["data"]
+    meta_block = "\n".join([f"{k}: {v}" for k, v in data.get("metadata", {}).items()])
+    return f"[{record['timestamp']}] ✅={data.get('verified', False)}\nUser: {data.get('input')}\nAgent: {data.get('output')}\n{meta_block}".strip()
 
 def get_memory(agent_name: str) -> str:
     memory_path = get_memory_path(agent_name)
@@ -29,17 +86,18 @@ def get_memory(agent_name: str) -> str:
         return f.read()
 
 def get_latest_memory(agent_name: str) -> str:
-    memory_path = get_memory_path(agent_name)
-    if not os.path.exists(memory_path):
-        return ""
-    with open(memory_path, "r", encoding="utf-8") as f:
-        logs = f.read().strip().split("="*40)
-        return logs[-2].strip() if len(logs) > 1 else logs[-1].strip()
+    _import_text_log(agent_name)
+    latest = get_memory_store().latest(1, agent=agent_name)
+    return _format_entry(latest[0]) if latest else ""
 
 def clear_memory(agent_name: str):
     memory_path = get_memory_path(agent_name)
-    if os.path.exists(memory_path):
-        os.remove(memory_path)
+    for path in (memory_path, memory_path + ".imported"):
+        if os.path.exists(path):
+            os.remove(path)
+    get_memory_store().delete(agent=agent_name)
+    with _import_lock:
+        _imported_agents.discard(agent_name)
 
 def auto_learn(agent_name: str):
     timestamp = datetime.datetime.now().isoformat()
@@ -49,16 +107,31 @@ def auto_learn(agent_name: str):
     save_memory(agent_name, user_input, agent_output, metadata)
     return f"Memory updated for {agent_name} at {timestamp}"
 def get_verified_memory(agent_name: str) -> list:
-    memory_path = get_memory_path(agent_name)
-    if not os.path.exists(memory_path):
-        return []
-    with open(memory_path, "r", encoding="utf-8") as f:
-        logs = f.read().strip().split("="*40)
-        verified_pairs = []
-        for log in logs:
-            if "✅=True" in log:
-                user_line = next((l for l in log.splitlines() if l.startswith("User: ")), None)
-                agent_line = next((l for l in log.splitlines() if l.startswith("Agent: ")), None)
-                if user_line and agent_line:
-                    verified_pairs.append((user_line[6:], agent_line[7:]))
-        return verified_pairs
\ No newline at end of file
+    _import_text_log(agent_name)
+    records = get_memory_store().query(agent=agent_name, verified=True)
+    return [(r["data"].get("input"), r["data"].get("output")) for r in records]
+
+
+class MemoryManager:
+    """Session-scoped event logger used by the dashboards, backed by the memory store."""
+
+    def __init__(self, agent_name: str = "GringoOps", session_id: str = None):
+        self.agent_name = agent_name
+        self.session_id = session_id or f"session_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.store = get_memory_store()
+
+    def log_event(self, event, data=None):
+        self.store.record(event, data, agent=self.agent_name, session=self.session_id)
+
+    def latest(self, n=10, **filters):
+        return self.store.latest(n, **filters)
+
+    def load_memory(self, n=50) -> str:
+        """This session's most recent events as text."""
+        return "\n".join(
+            f"[{r['timestamp']}] {r['event']}: {json.dumps(r['data'], ensure_ascii=False)}"
+            for r in self.store.latest(n, session=self.session_id)
+        )
+
+    def save(self):
+        pass  # every event is committed as it is logged
@@ -1,8 +1,8 @@
 import streamlit as st
-import os
-import json
 
 from FredFix.core import wizard_logic, wizard_state
+from lib.event_log import open_event_log
+from lib.memory_store import get_memory_store
 
 try:
     from streamlit_extras.switch_page_button import switch_page
@@ -72,13 +72,14 @@ with tab3:
 
     st.subheader("📚 Agent Memory Log")
     if st.button("🧠 Load Memory Log"):
-        if os.path.exists("Agent/memory.json"):
-            with open("Agent/memory.json", "r") as memfile:
-                memory_lines = memfile.readlines()
-                for line in memory_lines[-10:]:
-                    entry = json.loads(line)
-                    st.markdown(f"**{entry['timestamp']}** — `{entry['command']}` → {entry['result']}")
-        else:
+        # FredFixAgent exchanges come from the indexed memory store; cleanup events from the event log
+        entries = [{"timestamp": r["timestamp"], **r["data"]} for r in get_memory_store().latest(10, agent="FredFix")]
+        entries = entries or open_event_log("Agent/memory.json").tail(10)
+        for entry in entries:
+            label = entry.get("command") or entry.get("event")
+            detail = entry.get("result") or entry.get("filename", "")
+            st.markdown(f"**{entry.get('timestamp', '')}** — `{label}` → {detail}")
+        if not entries:
             st.warning("Memory log not found.")
 
 with tab4:
@@ -4,23 +4,36 @@ Handles generation, saving, and logging of AI-created code snippets.
 """
 
 import os
-import openai
 import datetime
+from lib.llm_cache import cached_call
+from lib.llm_metrics import track_call
+from lib.cassette import cassette_call
+from lib.clients import get_openai_client
 
-def generate_code(prompt: str, model="gpt-4", temperature=0.7):
+def generate_code(prompt: str, model="gpt-4", temperature=0.7, use_cache=True):
     """
     Generate Python code based on the given prompt.
+    Identical requests are served from the shared LLM cache unless use_cache is False
+    or the temperature samples (the default 0.7 does, so "Regenerate" gets new code).
     Placeholder for memory-enhanced context injection (to be implemented).
     """
-    response = openai.ChatCompletion.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": "Generate clean, production-grade Python code."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=temperature,
-    )
-    return response.choices[0].message.content.strip()
+    def request():
+        response = get_openai_client().chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "Generate clean, production-grade Python code."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+        )
+        return response.choices[0].message.content
+
+    def call_model():
+        with track_call("openai", model, prompt) as call:
+            call["completion"] = cassette_call("openai", {"model": model, "temperature": temperature, "prompt": prompt}, request)
+        return call["completion"].strip()
+
+    return cached_call("openai", model, temperature, prompt, call_model, use_cache=use_cache)
 
 def save_code_to_file(code: str, filename: str, directory: str = "generated"):
     """
@@ -5,22 +5,23 @@ from streamlit_webrtc import webrtc_streamer, WebRtcMode
 import tempfile
 import datetime
 import shutil
-from openai import OpenAI
-import json
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Adds GringoOps root to PYTHONPATH
+from lib.single_flight import coalesced_stream
+from lib.clients import get_openai_client
+from lib.llm_metrics import track_stream
+from lib.event_log import open_event_log
 MEMORY_PATH = os.path.expanduser("~/Projects/GringoOps/shared/memory.json")
 
 st.set_page_config(page_title="🧠 GringoOps Hub", layout="wide")
 
-if not os.path.exists(MEMORY_PATH):
-    with open(MEMORY_PATH, "w") as f:
-        json.dump([], f)
+# Events are appended to a segmented JSONL log; the timeline only reads its tail
+memory_log = open_event_log(MEMORY_PATH)
 
 with st.sidebar.expander("📜 Memory Timeline"):
     try:
-        with open(MEMORY_PATH) as f:
-            logs = json.load(f)
-            for entry in reversed(logs[-10:]):
-                st.markdown(f"**{entry['timestamp']}** — `{entry['event']}`")
+        for entry in reversed(memory_log.tail(10)):
+            st.markdown(f"**{entry['timestamp']}** — `{entry['event']}`")
     except Exception as e:
         st.warning(f"Could not load memory: {e}")
 
@@ -103,15 +104,11 @@ if 'fredfix_memory' not in st.session_state:
     st.session_state.fredfix_memory = []
 
 if fredfix_cmd:
-    with open(MEMORY_PATH, "r+") as f:
-        logs = json.load(f)
-        logs.append({
-            "timestamp": datetime.datetime.now().isoformat(),
-            "event": "FredFix Command",
-            "data": fredfix_cmd
-        })
-        f.seek(0)
-        json.dump(logs, f, indent=2)
+    memory_log.append({
+        "timestamp": datetime.datetime.now().isoformat(),
+        "event": "FredFix Command",
+        "data": fredfix_cmd
+    })
 
     st.session_state.fredfix_memory.append({"timestamp": datetime.datetime.now().isoformat(), "command": fredfix_cmd})
     st.success(f"Command logged: {fredfix_cmd}")
@@ -135,20 +132,16 @@ for entry in st.session_state.fredfix_memory[-10:]:
 st.divider()
 st.subheader("🤖 AI Chat Assistant")
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = get_openai_client(os.getenv("OPENAI_API_KEY"))
 
 chat_prompt = st.chat_input("Ask your dev assistant...")
 
 if chat_prompt:
-    with open(MEMORY_PATH, "r+") as f:
-        logs = json.load(f)
-        logs.append({
-            "timestamp": datetime.datetime.now().isoformat(),
-            "event": "AI Chat Prompt",
-            "data": chat_prompt
-        })
-        f.seek(0)
-        json.dump(logs, f, indent=2)
+    memory_log.append({
+        "timestamp": datetime.datetime.now().isoformat(),
+        "event": "AI Chat Prompt",
+        "data": chat_prompt
+    })
 
     with st.chat_message("user"):
         st.markdown(chat_prompt)
@@ -158,16 +151,27 @@ if chat_prompt:
                 try:
                     response = ""
                     container = st.empty()
-                    completion = client.chat.completions.create(
-                        model=selected_model,
-                        messages=[{"role": "user", "content": chat_prompt}],
-                        stream=True,
-                    )
-                    for chunk in completion:
-                        if chunk.choices and chunk.choices[0].delta.content:
-                            delta = chunk.choices[0].delta.content
-                            response += delta
-                            container.markdown(response)
+
+                    def openai_deltas():
+                        completion = client.chat.completions.create(
+                            model=selected_model,
+                            messages=[{"role": "user", "content": chat_prompt}],
+                            stream=True,
+                        )
+                        try:
+                            for chunk in completion:
+                                if chunk.choices and chunk.choices[0].delta.content:
+                                    yield chunk.choices[0].delta.content
+                        finally:
+                            completion.close()
+
+                    def openai_stream():
+                        return track_stream("openai", selected_model, chat_prompt, openai_deltas())
+
+                    # Sessions asking the same question share one OpenAI stream
+                    for delta in coalesced_stream(("openai", selected_model, chat_prompt), openai_stream):
+                        response += delta
+                        container.markdown(response)
                 except Exception as e:
                     st.error(f"OpenAI error: {e}")
         else:
@@ -1,8 +1,17 @@
 import difflib
 import os
-from openai import OpenAI
 from tools.config import load_config
 from tools.logger import log_markdown
+from lib.resilience import call_with_resilience
+from lib.llm_metrics import track_call
+from lib.clients import get_openai_client
+from lib.ast_chunker import should_chunk, patch_chunks
+
+PATCH_INSTRUCTION = "Improve and fix the following Python code:"
+CHUNK_PATCH_INSTRUCTION = (
+    "Improve and fix the following section of a Python file. Return only the "
+    "rewritten section as Python code; do not repeat the imports shown for context."
+)
 
 def autopatch_run(args):
     conf = load_config()
@@ -16,28 +25,43 @@ def autopatch_run(args):
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise EnvironmentError("OPENAI_API_KEY environment variable not set.")
-    client = OpenAI(api_key=api_key)
+    client = get_openai_client(api_key)
 
     print(f"🔧 Running AutoPatchBoy on: {file_path}")
     with open(file_path, "r") as f:
         original_code = f.read()
 
-    response = client.chat.completions.create(
-        model=conf["openai"]["model"],
-        messages=[
-            {"role": "system", "content": "Improve and fix the following Python code:"},
-            {"role": "user", "content": original_code}
-        ]
-    )
-    updated_code = response.choices[0].message.content.strip()
-
-    diff = difflib.unified_diff(
-        original_code.splitlines(),
-        updated_code.splitlines(),
-        fromfile="original",
-        tofile="patched",
-        lineterm=""
-    )
+    def request_patch(instruction, code):
+        with track_call("openai", conf["openai"]["model"], code) as call:
+            response = call_with_resilience("openai", lambda: client.chat.completions.create(
+                model=conf["openai"]["model"],
+                messages=[
+                    {"role": "system", "content": instruction},
+                    {"role": "user", "content": code}
+                ]
+            ))
+            call["completion"] = response.choices[0].message.content
+        return call["completion"]
+
+    chunked = getattr(args, "chunked", None)
+    if chunked is None:
+        chunked = should_chunk(original_code)
+    if chunked:
+        # Large files are patched per top-level def/class in parallel and merged into one diff
+        result = patch_chunks(original_code, lambda p: request_patch(CHUNK_PATCH_INSTRUCTION, p), path=file_path)
+        updated_code = result["code"]
+        diff = result["diff"]
+        for start, end in result["rejected"]:
+            print(f"⚠️ Kept original lines {start}-{end}: patch did not parse.")
+    else:
+        updated_code = request_patch(PATCH_INSTRUCTION, original_code).strip()
+        diff = list(difflib.unified_diff(
+            original_code.splitlines(),
+            updated_code.splitlines(),
+            fromfile="original",
+            tofile="patched",
+            lineterm=""
+        ))
     print("\n".join(diff))
 
     if supervised:
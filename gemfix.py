@@ -1,13 +1,53 @@
 import os
 import json
+import argparse
 from pathlib import Path
 from FredFix.core.agent import CreatorAgent
 from Agent.memory import save_memory
 from tools.gemini_query import gemini_review
+from lib.resilience import call_with_resilience, is_available, get_breaker, CircuitOpenError, ResilienceError
+from lib.json_stream import StreamingJSONParser
+from lib.llm_router import stream_prompt
 
 PROJECT_ROOT = Path(__file__).parent
 
-def scan_and_review_all():
+def resilient_stream(prompt, provider="gemini"):
+    """
+    Streams prompt under the provider's rate limit, retries and circuit breaker.
+    Opening the stream and the first chunk go through call_with_resilience; a
+    failure after that can't be retried, but still counts against the breaker.
+    """
+    def open_stream():
+        chunks = stream_prompt(prompt, provider=provider)
+        return chunks, next(chunks, None)
+
+    chunks, first = call_with_resilience(provider, open_stream)
+    if first is None:
+        return
+    yield first
+    try:
+        yield from chunks
+    except Exception:
+        get_breaker(provider).record_failure()
+        raise
+
+def stream_review(file_path, review_prompt):
+    """
+    Streams the Gemini review and applies each fix as soon as its JSON object closes.
+    If the response is cut off or malformed partway, the fixes that did arrive are kept.
+    """
+    parser = StreamingJSONParser(("suggestions", "fixes"))
+    try:
+        for key, item in parser.iter_items(resilient_stream(review_prompt, provider="gemini")):
+            if key == "fixes":
+                apply_fixes(file_path, [item])
+    except Exception as e:
+        print(f"⚠️ Review stream for {file_path} ended early: {e}")
+    parsed = parser.result()
+    parsed.setdefault("file", file_path.name)
+    return parsed
+
+def scan_and_review_all(stream=False):
     reviewed_files = []
     memory_log = []
 
@@ -40,7 +80,28 @@ def scan_and_review_all():
         }}
         """
         print(f"🔍 Reviewing: {file_path}")
-        result = gemini_review(review_prompt)
+        if stream:
+            if not is_available("gemini"):
+                print("⛔ gemini circuit is open. Stopping scan.")
+                break
+            parsed = stream_review(file_path, review_prompt)
+            if parsed.get("truncated") and not (parsed["fixes"] or parsed["suggestions"]):
+                print(f"❌ No usable Gemini output for {file_path}")
+                continue
+            reviewed_files.append(parsed["file"])
+            save_memory("GemFix", f"Audit: {file_path.name}", json.dumps(parsed))
+            memory_log.append(parsed)
+            continue
+
+        try:
+            result = call_with_resilience("gemini", lambda: gemini_review(review_prompt))
+        except CircuitOpenError as e:
+            # Gemini keeps failing; stop the scan instead of hammering it file by file
+            print(f"⛔ {e}. Stopping scan.")
+            break
+        except ResilienceError as e:
+            print(f"⚠️ Error in review: {e}")
+            continue
 
         if isinstance(result, str):
             print(f"⚠️ Error in review: {result}")
@@ -58,20 +119,33 @@ def scan_and_review_all():
     print(f"✅ Scanned {len(reviewed_files)} files. Memory stored.")
     return memory_log
 
+def _valid_fix(fix):
+    return isinstance(fix, dict) and isinstance(fix.get("old"), str) and fix["old"] \
+        and isinstance(fix.get("new"), str)
+
 def apply_fixes(file_path, fixes):
     if not fixes:
         return
 
     with open(file_path, "r", encoding="utf-8") as f:
         code = f.read()
+    original = code
 
     for fix in fixes:
+        if not _valid_fix(fix):
+            print(f"⚠️ Skipping malformed fix for {file_path.name}: {fix!r}"[:200])
+            continue
         if fix["old"] in code:
             code = code.replace(fix["old"], fix["new"])
+    if code == original:
+        return
 
     with open(file_path, "w", encoding="utf-8") as f:
         f.write(code)
     print(f"🛠 Patched: {file_path.name}")
 
 if __name__ == "__main__":
-    scan_and_review_all()
+    parser = argparse.ArgumentParser(description="Gemini repo audit")
+    parser.add_argument("--stream", action="store_true", help="Apply fixes progressively as the review streams in")
+    args = parser.parse_args()
+    scan_and_review_all(stream=args.stream)
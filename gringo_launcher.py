@@ -1,8 +1,6 @@
 import os
-import openai
 import streamlit as st
 from google.cloud import secretmanager
-from pathlib import Path
 
 @st.cache_resource
 def get_secret(secret_id):
@@ -25,7 +23,8 @@ secrets = {
 tool = st.sidebar.radio("Choose a tool to run:", ["Chat", "Review", "AutoPatch", "Summarize", "Logs", "📦 New App", "🧪 System Check"])
 
 from tools.config import load_config
-from lib.keychain import get_key
+from lib.clients import get_openai_client
+from lib.llm_metrics import track_call
 from tools import openai_review
 from plugins.autopatch import autopatch_run
 from plugins.summarize import run as summarize_run
@@ -60,15 +59,20 @@ if tool == "Chat":
         if selected_model == "openai":
             try:
                 api_key = openai_key
-                client = openai.OpenAI(api_key=api_key)
-                response = client.chat.completions.create(
-                    model="gpt-4-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant."},
-                        {"role": "user", "content": user_input}
-                    ]
-                )
-                st.markdown(f"**GPT-4 Turbo Response:**\n\n{response.choices[0].message.content}")
+                client = get_openai_client(api_key)
+                with track_call("openai", "gpt-4-turbo", user_input) as call:
+                    response = client.chat.completions.create(
+                        model="gpt-4-turbo",
+                        messages=[
+                            {"role": "system", "content": "You are a helpful assistant."},
+                            {"role": "user", "content": user_input}
+                        ]
+                    )
+                    call["completion"] = response.choices[0].message.content
+                    if response.usage:
+                        call["prompt_tokens"] = response.usage.prompt_tokens
+                        call["completion_tokens"] = response.usage.completion_tokens
+                st.markdown(f"**GPT-4 Turbo Response:**\n\n{call['completion']}")
             except Exception as e:
                 st.error(f"❌ OpenAI API error: {e}")
         else:
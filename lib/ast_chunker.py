@@ -0,0 +1,148 @@
+import os
+import ast
+import difflib
+from concurrent.futures import ThreadPoolExecutor
+from lib.dual_review import extract_code
+
+# AST chunking for files too big for one review/patch prompt. Source is cut only
+# at top-level statement boundaries (a def/class keeps its decorators and the
+# comment block above it), so every chunk parses on its own and the chunks
+# concatenate back to the exact original file. Chunks are sent concurrently, each
+# prefixed with the module's imports, and the answers are merged in file order.
+CHUNK_THRESHOLD_LINES = int(os.getenv("AST_CHUNK_THRESHOLD_LINES", "300"))
+CHUNK_MAX_LINES = int(os.getenv("AST_CHUNK_MAX_LINES", "150"))
+CHUNK_WORKERS = int(os.getenv("AST_CHUNK_WORKERS", "4"))
+CONTEXT_TEMPLATE = (
+    "This is lines {start}-{end} of {path}. The module's imports are shown for "
+    "context only:\n\n{imports}\n\n--- Lines {start}-{end} ---\n{text}"
+)
+
+
+def should_chunk(source, threshold=CHUNK_THRESHOLD_LINES) -> bool:
+    """True for files over the threshold that parse; anything else goes in one prompt."""
+    return len(source.splitlines()) > threshold and _parses(source)
+
+
+def import_context(source) -> str:
+    """Top-level import statements, shared with every chunk so names resolve."""
+    tree = ast.parse(source)
+    imports = [ast.get_source_segment(source, node) for node in tree.body
+               if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(i for i in imports if i)
+
+
+def _boundaries(source, tree):
+    """0-based line indexes where a top-level statement (plus its lead-in comments) starts."""
+    lines = source.splitlines(keepends=True)
+    starts, previous_end = [], 0
+    for node in tree.body:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])]) - 1
+        while start > previous_end and lines[start - 1].lstrip().startswith("#"):
+            start -= 1
+        starts.append(start)
+        previous_end = node.end_lineno
+    if starts:
+        starts[0] = 0
+    return starts
+
+
+def split_chunks(source, max_lines=CHUNK_MAX_LINES) -> list:
+    """
+    Packs consecutive top-level statements into chunks of at most max_lines.
+    A single def/class longer than max_lines becomes its own chunk.
+    Returns [{"start", "end", "names", "text"}] with 1-based inclusive line numbers.
+    """
+    tree = ast.parse(source)
+    lines = source.splitlines(keepends=True)
+    starts = _boundaries(source, tree)
+    if not starts:
+        return [{"start": 1, "end": len(lines), "names": [], "text": source}]
+
+    segments = []
+    for i, node in enumerate(tree.body):
+        end = starts[i + 1] if i + 1 < len(starts) else len(lines)
+        name = getattr(node, "name", None)
+        segments.append((starts[i], end, [name] if name else []))
+
+    chunks, current = [], None
+    for start, end, names in segments:
+        if current and end - current["start0"] > max_lines:
+            chunks.append(current)
+            current = None
+        if current is None:
+            current = {"start0": start, "end0": end, "names": list(names)}
+        else:
+            current["end0"] = end
+            current["names"].extend(names)
+    chunks.append(current)
+
+    return [{
+        "start": c["start0"] + 1,
+        "end": c["end0"],
+        "names": c["names"],
+        "text": "".join(lines[c["start0"]:c["end0"]]),
+    } for c in chunks]
+
+
+def chunk_prompt(chunk, imports, path="this file") -> str:
+    return CONTEXT_TEMPLATE.format(start=chunk["start"], end=chunk["end"], path=path,
+                                   imports=imports or "# (no imports)", text=chunk["text"])
+
+
+def map_chunks(chunks, fn, workers=CHUNK_WORKERS) -> list:
+    """Runs fn(chunk) on every chunk concurrently; results come back in file order."""
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+        return list(pool.map(fn, chunks))
+
+
+def review_chunks(source, review_fn, path="this file", max_lines=CHUNK_MAX_LINES, workers=CHUNK_WORKERS) -> str:
+    """
+    Reviews each chunk with review_fn(prompt) and merges the answers into one
+    report with a section per chunk.
+    """
+    imports = import_context(source)
+    chunks = split_chunks(source, max_lines)
+    reviews = map_chunks(chunks, lambda c: review_fn(chunk_prompt(c, imports, path)), workers)
+    sections = []
+    for chunk, review in zip(chunks, reviews):
+        names = ", ".join(chunk["names"]) or "module code"
+        sections.append(f"## Lines {chunk['start']}-{chunk['end']} ({names})\n\n{(review or '').strip()}")
+    return f"# Review of {path} ({len(chunks)} chunks)\n\n" + "\n\n".join(sections)
+
+
+def _parses(text):
+    try:
+        ast.parse(text)
+        return True
+    except SyntaxError:
+        return False
+
+
+def patch_chunks(source, patch_fn, path="this file", max_lines=CHUNK_MAX_LINES, workers=CHUNK_WORKERS) -> dict:
+    """
+    Patches each chunk with patch_fn(prompt) and stitches the results back
+    together. A chunk whose answer doesn't parse keeps its original code, so one
+    bad answer can't break the rest of the file.
+    Returns {"code", "diff", "rejected"} where rejected lists skipped chunk ranges.
+    """
+    imports = import_context(source)
+    chunks = split_chunks(source, max_lines)
+    answers = map_chunks(chunks, lambda c: patch_fn(chunk_prompt(c, imports, path)), workers)
+
+    patched, rejected = [], []
+    for chunk, answer in zip(chunks, answers):
+        code = extract_code(answer or "").strip("\n")
+        if not code or not _parses(code):
+            rejected.append((chunk["start"], chunk["end"]))
+            patched.append(chunk["text"])
+            continue
+        # Keep the original spacing between chunks
+        original = chunk["text"]
+        patched.append(code + (original[len(original.rstrip("\n")):] or "\n"))
+    code = "".join(patched)
+
+    diff = list(difflib.unified_diff(
+        source.splitlines(), code.splitlines(),
+        fromfile="original", tofile="patched", lineterm=""
+    ))
+    return {"code": code, "diff": diff, "rejected": rejected}
@@ -0,0 +1,132 @@
+import os
+import re
+import ast
+import json
+import threading
+from collections import defaultdict
+from lib.ollama_client import generate
+
+# Cascade routing: try the smallest local model first and only escalate to a
+# larger one when cheap checks on the answer fail. Most routine prompts are
+# settled by the first tier.
+DEFAULT_TIERS = [m.strip() for m in os.getenv("CASCADE_TIERS", "tinyllama,phi,mistral").split(",") if m.strip()]
+ACCEPT_THRESHOLD = float(os.getenv("CASCADE_ACCEPT_THRESHOLD", "0.6"))
+# Score cap for answers without a CONFIDENCE line; small models often skip it, and an
+# answer that didn't follow the instruction shouldn't pass as fully confident
+MISSING_CONFIDENCE = float(os.getenv("CASCADE_MISSING_CONFIDENCE", "0.5"))
+CONFIDENCE_INSTRUCTION = "\n\nAfter your answer, add a final line of the form CONFIDENCE: <0-100>."
+CONFIDENCE_PATTERN = re.compile(r"^\s*CONFIDENCE:\s*(\d{1,3})\s*%?\s*$", re.IGNORECASE | re.MULTILINE)
+CODE_FENCE = re.compile(r"```(?:\w+)?\n(.*?)```", re.DOTALL)
+HEDGING_PHRASES = ("i'm not sure", "i am not sure", "i don't know", "i cannot", "i can't", "as an ai")
+# Prompts that ask for code or a fix, or for a JSON reply; their answers are checked by parsing
+CODE_REQUEST = re.compile(
+    r"\b(fix|patch|refactor|rewrite|implement)\b"
+    r"|\b(write|generate|create|complete)\b.{0,40}\b(function|class|script|code|module|test)s?\b",
+    re.IGNORECASE | re.DOTALL
+)
+JSON_REQUEST = re.compile(r"\b(in|as|return|respond with|reply with|output)\s+(valid\s+)?json\b", re.IGNORECASE)
+
+CASCADE_STATS = {"requests": 0, "served_by": defaultdict(int), "escalations": defaultdict(int)}
+_stats_lock = threading.Lock()
+
+
+def split_confidence(answer):
+    """Strips the self-reported CONFIDENCE line and returns (answer, confidence 0-1 or None)."""
+    matches = list(CONFIDENCE_PATTERN.finditer(answer))
+    if not matches:
+        return answer.strip(), None
+    confidence = min(int(matches[-1].group(1)), 100) / 100
+    return CONFIDENCE_PATTERN.sub("", answer).strip(), confidence
+
+
+def score_answer(answer, expect=None, confidence=None):
+    """
+    Scores an answer from 0 to 1 with cheap heuristics.
+    expect="code" requires the answer (or its fenced block) to parse as Python;
+    expect="json" requires it to parse as JSON. Without a self-reported
+    confidence the score is capped at MISSING_CONFIDENCE.
+    """
+    reasons = []
+    if not answer or len(answer.strip()) < 2:
+        return 0.0, ["empty answer"]
+
+    score = 1.0
+    if expect == "code":
+        fenced = CODE_FENCE.findall(answer)
+        source = "\n".join(fenced) if fenced else answer
+        try:
+            ast.parse(source)
+        except SyntaxError:
+            return 0.0, ["code does not parse"]
+    elif expect == "json":
+        try:
+            json.loads(answer)
+        except ValueError:
+            return 0.0, ["invalid JSON"]
+
+    if any(phrase in answer.lower() for phrase in HEDGING_PHRASES):
+        score -= 0.4
+        reasons.append("hedging language")
+    if confidence is not None:
+        score = min(score, confidence)
+        reasons.append(f"self-reported confidence {confidence:.2f}")
+    else:
+        score = min(score, MISSING_CONFIDENCE)
+        reasons.append("no confidence reported")
+    return max(score, 0.0), reasons
+
+
+def infer_expect(prompt):
+    """"json" or "code" when the prompt asks for one, else None (no parse check)."""
+    if JSON_REQUEST.search(prompt):
+        return "json"
+    if CODE_REQUEST.search(prompt):
+        return "code"
+    return None
+
+
+def cascade_generate(prompt, tiers=None, expect=None, threshold=ACCEPT_THRESHOLD, generate_fn=generate) -> dict:
+    """
+    Runs the prompt through the model tiers in order, returning the first answer that
+    scores at or above threshold. The last tier's answer is always accepted.
+    Pass expect (see score_answer) for code or JSON prompts; infer_expect can pick it.
+    """
+    tiers = DEFAULT_TIERS if tiers is None else tiers
+    if not tiers:
+        raise ValueError("No cascade tiers configured; set CASCADE_TIERS to a comma-separated list of models")
+    with _stats_lock:
+        CASCADE_STATS["requests"] += 1
+
+    attempts = []
+    for index, model in enumerate(tiers):
+        last_tier = index == len(tiers) - 1
+        try:
+            raw = generate_fn(prompt + CONFIDENCE_INSTRUCTION, model=model)
+        except Exception as e:
+            if last_tier:
+                raise
+            attempts.append({"model": model, "error": str(e)})
+            continue
+
+        answer, confidence = split_confidence(raw)
+        score, reasons = score_answer(answer, expect=expect, confidence=confidence)
+        attempts.append({"model": model, "score": score, "reasons": reasons})
+        if score >= threshold or last_tier:
+            with _stats_lock:
+                CASCADE_STATS["served_by"][model] += 1
+            return {"output": answer, "model": model, "tier": index, "score": score, "attempts": attempts}
+
+        with _stats_lock:
+            CASCADE_STATS["escalations"][model] += 1
+        print(f"[cascade] {model} scored {score:.2f} ({', '.join(reasons)}), escalating")
+
+
+def cascade_stats() -> dict:
+    """Share of requests settled at each tier."""
+    with _stats_lock:
+        requests = CASCADE_STATS["requests"]
+        return {
+            "requests": requests,
+            "hit_rate": {m: round(n / requests, 3) for m, n in CASCADE_STATS["served_by"].items()} if requests else {},
+            "escalations": dict(CASCADE_STATS["escalations"]),
+        }
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import defaultdict
+
+# Record/replay layer under the LLM clients, for profiling pipelines offline.
+#   GRINGO_LLM_CASSETTE_MODE=record  calls the live model and appends each
+#                                    request/response pair (with timing) to the cassette
+#   GRINGO_LLM_CASSETTE_MODE=replay  serves recorded responses without touching the network
+# Replay is deterministic: the Nth identical request gets the Nth recorded response
+# (cycling). GRINGO_LLM_CASSETTE_LATENCY_SCALE=1 sleeps for the recorded latency,
+# 0 (the default) returns immediately.
+CASSETTE_MODE = os.getenv("GRINGO_LLM_CASSETTE_MODE", "off").lower()
+CASSETTE_PATH = os.path.expanduser(os.getenv("GRINGO_LLM_CASSETTE", "~/.gringoops/cassettes/default.jsonl"))
+LATENCY_SCALE = float(os.getenv("GRINGO_LLM_CASSETTE_LATENCY_SCALE", "0"))
+
+
+class CassetteMiss(RuntimeError):
+    pass
+
+
+def request_key(provider, request) -> str:
+    raw = json.dumps([provider, request], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    def __init__(self, path=CASSETTE_PATH, mode=CASSETTE_MODE, latency_scale=LATENCY_SCALE):
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._episodes = defaultdict(list)
+        self._replay_pos = defaultdict(int)
+        self._lock = threading.Lock()
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise CassetteMiss(f"No cassette at {self.path}; record one with GRINGO_LLM_CASSETTE_MODE=record")
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    episode = json.loads(line)
+                    self._episodes[episode["key"]].append(episode)
+
+    def _append(self, episode):
+        line = json.dumps(episode, default=str) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def _next(self, provider, request):
+        key = request_key(provider, request)
+        with self._lock:
+            episodes = self._episodes.get(key)
+            if not episodes:
+                raise CassetteMiss(f"No recorded {provider} response for request {key[:12]}")
+            episode = episodes[self._replay_pos[key] % len(episodes)]
+            self._replay_pos[key] += 1
+        return episode
+
+    def _sleep(self, seconds):
+        if self.latency_scale > 0 and seconds > 0:
+            time.sleep(seconds * self.latency_scale)
+
+    def call(self, provider, request, fn):
+        if self.mode == "replay":
+            episode = self._next(provider, request)
+            self._sleep(episode["latency"])
+            return episode["response"]
+
+        start = time.perf_counter()
+        response = fn()
+        if self.mode == "record":
+            self._append({
+                "key": request_key(provider, request),
+                "provider": provider,
+                "request": request,
+                "response": response,
+                "latency": round(time.perf_counter() - start, 4),
+                "recorded_at": time.time(),
+            })
+        return response
+
+    def stream(self, provider, request, stream_fn):
+        if self.mode == "replay":
+            episode = self._next(provider, request)
+            elapsed = 0.0
+            for offset, chunk in episode["chunks"]:
+                self._sleep(offset - elapsed)
+                elapsed = offset
+                yield chunk
+            return
+
+        if self.mode != "record":
+            yield from stream_fn()
+            return
+
+        start = time.perf_counter()
+        chunks = []
+        for chunk in stream_fn():
+            chunks.append([round(time.perf_counter() - start, 4), chunk])
+            yield chunk
+        # Only complete streams are recorded; an abandoned one would replay truncated
+        self._append({
+            "key": request_key(provider, request),
+            "provider": provider,
+            "request": request,
+            "chunks": chunks,
+            "latency": round(time.perf_counter() - start, 4),
+            "recorded_at": time.time(),
+        })
+
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Cassette:
+    global _cassette
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette()
+    return _cassette
+
+
+def cassette_call(provider, request, fn):
+    """Returns fn()'s JSON-serializable result, recording or replaying it per GRINGO_LLM_CASSETTE_MODE."""
+    if CASSETTE_MODE not in ("record", "replay"):
+        return fn()
+    return get_cassette().call(provider, request, fn)
+
+
+def cassette_stream(provider, request, stream_fn):
+    """Streaming counterpart of cassette_call; chunk timing is recorded relative to the request start."""
+    if CASSETTE_MODE not in ("record", "replay"):
+        return stream_fn()
+    return get_cassette().stream(provider, request, stream_fn)
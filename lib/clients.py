@@ -0,0 +1,74 @@
+import os
+import threading
+import importlib.util
+
+# Process-wide registry of authenticated provider clients. Building an SDK client
+# per call (or per Streamlit rerun) also builds a fresh connection pool, so every
+# request paid for a TLS handshake. Clients here are created once per API key and
+# reused; module state survives Streamlit reruns. SDKs and httpx are imported on
+# first use so importing this module stays cheap.
+HTTP2 = os.getenv("LLM_HTTP2", "1") == "1" and importlib.util.find_spec("h2") is not None
+HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "120"))
+HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "600"))
+
+_clients = {}
+_gemini_key = None
+_lock = threading.Lock()
+
+
+def _http_client():
+    try:
+        import httpx
+    except ImportError:
+        return None
+    return httpx.Client(
+        http2=HTTP2,
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                            max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=10.0),
+    )
+
+
+def get_openai_client(api_key=None):
+    """Returns the shared OpenAI client for this key (OPENAI_API_KEY by default)."""
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    key = ("openai", api_key)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            from openai import OpenAI
+            kwargs = {"api_key": api_key} if api_key else {}
+            http_client = _http_client()
+            if http_client is not None:
+                kwargs["http_client"] = http_client
+            client = OpenAI(**kwargs)
+            _clients[key] = client
+    return client
+
+
+def get_gemini_model(model="gemini-pro", api_key=None):
+    """Returns a shared GenerativeModel; genai is configured once per key rather than per call."""
+    global _gemini_key
+    api_key = api_key or os.getenv("GEMINI_API_KEY")
+    key = ("gemini", api_key, model)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            import google.generativeai as genai
+            if _gemini_key != api_key:
+                genai.configure(api_key=api_key)
+                _gemini_key = api_key
+            client = genai.GenerativeModel(model)
+            _clients[key] = client
+    return client
+
+
+def close_all():
+    with _lock:
+        for client in _clients.values():
+            close = getattr(client, "close", None)
+            if callable(close):
+                close()
+        _clients.clear()
@@ -0,0 +1,125 @@
+import os
+import re
+import ast
+import json
+import difflib
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Dual-model review: run OpenAI and Gemini on the same prompt at the same time
+# (wall time is the slower model, not the sum), accept straight away when they
+# agree, and otherwise pick the better answer by score instead of asking a person.
+# Choices use resolve_conflict's codes: "o" (OpenAI), "g" (Gemini), "s" (skip).
+AGREE_THRESHOLD = float(os.getenv("DUAL_REVIEW_AGREE_THRESHOLD", "0.9"))
+DEFAULT_WEIGHTS = {"ast": 2.0, "tests": 3.0, "length": 1.0}
+SCORE_WEIGHTS = {**DEFAULT_WEIGHTS, **json.loads(os.getenv("DUAL_REVIEW_WEIGHTS", "{}"))}
+# Optional test command run against each candidate; "{file}" is replaced with its path
+TEST_COMMAND = os.getenv("DUAL_REVIEW_TEST_CMD")
+TEST_TIMEOUT = float(os.getenv("DUAL_REVIEW_TEST_TIMEOUT", "120"))
+
+CODE_FENCE = re.compile(r"```(?:\w+)?\n(.*?)```", re.DOTALL)
+PROVIDER_CHOICES = {"openai": "o", "gemini": "g"}
+
+
+def extract_code(text) -> str:
+    blocks = CODE_FENCE.findall(text or "")
+    return "\n".join(blocks) if blocks else (text or "")
+
+
+def normalize(text) -> list:
+    """Code lines with whitespace collapsed and blank lines dropped."""
+    lines = (" ".join(line.split()) for line in extract_code(text).splitlines())
+    return [line for line in lines if line]
+
+
+def similarity(a, b) -> float:
+    return difflib.SequenceMatcher(None, normalize(a), normalize(b), autojunk=False).ratio()
+
+
+def ast_valid(text) -> bool:
+    try:
+        ast.parse(extract_code(text))
+        return True
+    except SyntaxError:
+        return False
+
+
+def tests_pass(text, test_command=TEST_COMMAND):
+    """True/False from running the test command on the candidate, or None if none is configured."""
+    if not test_command:
+        return None
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+        f.write(extract_code(text))
+        path = f.name
+    try:
+        result = subprocess.run(test_command.replace("{file}", path), shell=True,
+                                capture_output=True, text=True, timeout=TEST_TIMEOUT)
+        return result.returncode == 0
+    except subprocess.TimeoutExpired:
+        return False
+    finally:
+        os.remove(path)
+
+
+def score_output(text, other, weights=None, test_command=TEST_COMMAND):
+    weights = weights or SCORE_WEIGHTS
+    breakdown = {"ast": 1.0 if ast_valid(text) else 0.0}
+    passed = tests_pass(text, test_command)
+    if passed is not None:
+        breakdown["tests"] = 1.0 if passed else 0.0
+    # The more concise candidate gets the full length point
+    lengths = [len(extract_code(t)) for t in (text, other)]
+    breakdown["length"] = min(lengths) / max(lengths[0], 1)
+    score = sum(weights.get(name, 0.0) * value for name, value in breakdown.items())
+    return score, breakdown
+
+
+def arbitrate(openai_output, gemini_output, weights=None, threshold=AGREE_THRESHOLD, test_command=TEST_COMMAND) -> dict:
+    """Chooses between two outputs without asking: agreement first, then scoring."""
+    if not openai_output and not gemini_output:
+        return {"choice": "s", "reason": "both models failed", "output": None}
+    if not gemini_output:
+        return {"choice": "o", "reason": "gemini failed", "output": openai_output}
+    if not openai_output:
+        return {"choice": "g", "reason": "openai failed", "output": gemini_output}
+
+    ratio = similarity(openai_output, gemini_output)
+    if ratio >= threshold:
+        return {"choice": "o", "reason": "models agree", "similarity": ratio, "output": openai_output}
+
+    openai_score, openai_breakdown = score_output(openai_output, gemini_output, weights, test_command)
+    gemini_score, gemini_breakdown = score_output(gemini_output, openai_output, weights, test_command)
+    choice = "g" if gemini_score > openai_score else "o"
+    return {
+        "choice": choice,
+        "reason": "scored",
+        "similarity": ratio,
+        "scores": {"openai": openai_breakdown, "gemini": gemini_breakdown},
+        "output": gemini_output if choice == "g" else openai_output,
+    }
+
+
+def run_both(prompt, runner=None) -> dict:
+    """Sends the prompt to OpenAI and Gemini concurrently; a failed provider maps to None."""
+    if runner is None:
+        from lib.llm_router import complete_prompt
+        runner = lambda p, provider: complete_prompt(p, provider).get("result")
+
+    def call(provider):
+        try:
+            return runner(prompt, provider)
+        except Exception as e:
+            print(f"[dual_review] {provider} failed: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=len(PROVIDER_CHOICES)) as pool:
+        futures = {provider: pool.submit(call, provider) for provider in PROVIDER_CHOICES}
+        return {provider: future.result() for provider, future in futures.items()}
+
+
+def dual_review(prompt, runner=None, **arbitrate_kwargs) -> dict:
+    outputs = run_both(prompt, runner)
+    decision = arbitrate(outputs["openai"], outputs["gemini"], **arbitrate_kwargs)
+    decision["outputs"] = outputs
+    return decision
@@ -0,0 +1,232 @@
+import os
+import re
+import sys
+import json
+import threading
+from collections import deque
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+# Append-only event log. Each event is one JSON line appended to current.jsonl,
+# so logging costs the same no matter how long the history is (the old
+# json.load / append / json.dump(indent=2) cycle rewrote the whole file on every
+# event). Appends take an exclusive file lock, so several processes can log to
+# the same log. When the active file passes the segment size it is renamed to
+# the next numbered segment. Readers stream segments oldest to newest.
+#
+#   log = open_event_log("~/Projects/GringoOps/shared_memory.json")
+#   log.append({"event": "App started", ...})
+#   for entry in log.tail(10): ...
+#
+# A legacy JSON-array file at that path is converted once, streaming, on first open
+# (or with: python -m lib.event_log convert <file.json>).
+SEGMENT_BYTES = int(os.getenv("GRINGO_EVENT_LOG_SEGMENT_BYTES", str(8 * 1024 * 1024)))
+MAX_SEGMENTS = int(os.getenv("GRINGO_EVENT_LOG_MAX_SEGMENTS", "0"))  # rotated segments kept; 0 keeps all
+ACTIVE_NAME = "current.jsonl"
+SEGMENT_PATTERN = re.compile(r"^segment-(\d+)\.jsonl$")
+READ_CHUNK = 64 * 1024
+
+
+def log_dir_for(path) -> Path:
+    """memory.json -> memory.events/ next to it."""
+    path = Path(os.path.expanduser(str(path)))
+    return path.with_name(path.stem + ".events")
+
+
+def iter_json_array(f, chunk_size=READ_CHUNK):
+    """Yields the items of a JSON array from a text file without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer, pos, started, eof = "", 0, False, False
+    while True:
+        while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+            pos += 1
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("not a JSON array")
+                started, pos = True, pos + 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # A number cut by the chunk ("6." of "6.5") may continue in the next
+                # one; an item is complete once a separator or the closing ] follows
+                rest = buffer[end:].lstrip()
+                if (rest and rest[0] in ",]") or eof:
+                    yield item
+                    pos = end
+                    continue
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+        elif eof:
+            if started:
+                raise ValueError("unterminated JSON array")
+            return
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if fcntl is not None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._thread_lock.release()
+
+
+class EventLog:
+    def __init__(self, directory, segment_bytes=SEGMENT_BYTES, max_segments=MAX_SEGMENTS):
+        self.directory = Path(os.path.expanduser(str(directory)))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.active = self.directory / ACTIVE_NAME
+        self._lock = _FileLock(self.directory / ".lock")
+
+    def append(self, entry):
+        line = json.dumps(entry, default=str, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.active, "a", encoding="utf-8") as f:
+                f.write(line)
+                size = f.tell()
+            if size >= self.segment_bytes:
+                self._rotate()
+
+    def _segments(self):
+        numbered = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                numbered.append((int(match.group(1)), self.directory / name))
+        return [path for _, path in sorted(numbered)]
+
+    def _rotate(self):
+        segments = self._segments()
+        last = int(SEGMENT_PATTERN.match(segments[-1].name).group(1)) if segments else 0
+        os.replace(self.active, self.directory / f"segment-{last + 1:06d}.jsonl")
+        if self.max_segments:
+            # segments plus the one just rotated; drop the oldest beyond the limit
+            for old in segments[:max(0, len(segments) + 1 - self.max_segments)]:
+                old.unlink(missing_ok=True)
+
+    def files(self) -> list:
+        """Segment files oldest first, active file last."""
+        files = self._segments()
+        if self.active.exists():
+            files.append(self.active)
+        return files
+
+    def __iter__(self):
+        for path in self.files():
+            try:
+                f = open(path, encoding="utf-8")
+            except FileNotFoundError:  # rotated or pruned while reading
+                continue
+            with f:
+                for line in f:
+                    entry = _parse_line(line)
+                    if entry is not None:
+                        yield entry
+
+    def tail(self, n=10) -> list:
+        """The last n events, oldest first; only reads as many segments as needed."""
+        recent = deque()
+        if n <= 0:
+            return []
+        for path in reversed(self.files()):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    entries = [e for e in map(_parse_line, f) if e is not None]
+            except FileNotFoundError:
+                continue
+            recent.extendleft(reversed(entries[-(n - len(recent)):]))
+            if len(recent) >= n:
+                break
+        return list(recent)
+
+    def import_legacy(self, json_path) -> int:
+        """
+        Streams a legacy JSON-array history into the log, ahead of any existing
+        events, then renames the old file to *.migrated so it is converted once.
+        """
+        json_path = Path(os.path.expanduser(str(json_path)))
+        with self._lock:
+            if not json_path.exists():
+                return 0
+            if (self.directory / "segment-000000.jsonl").exists():
+                raise ValueError(f"{self.directory} already holds a converted history")
+            tmp = self.directory / "segment-000000.jsonl.tmp"
+            count = 0
+            try:
+                with open(json_path, encoding="utf-8") as src, open(tmp, "w", encoding="utf-8") as dst:
+                    for item in iter_json_array(src):
+                        dst.write(json.dumps(item, default=str, ensure_ascii=False) + "\n")
+                        count += 1
+            except Exception:
+                tmp.unlink(missing_ok=True)
+                raise
+            os.replace(tmp, self.directory / "segment-000000.jsonl")
+            os.replace(json_path, json_path.with_name(json_path.name + ".migrated"))
+        return count
+
+
+def _parse_line(line):
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return None  # torn write from a crashed process
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def open_event_log(path, **kwargs) -> EventLog:
+    """
+    Returns the shared EventLog for a legacy history path (memory.json ->
+    memory.events/), converting the old file on first open.
+    """
+    directory = log_dir_for(path)
+    with _logs_lock:
+        log = _logs.get(directory)
+        if log is None:
+            log = EventLog(directory, **kwargs)
+            legacy = Path(os.path.expanduser(str(path)))
+            if legacy.exists():
+                try:
+                    count = log.import_legacy(legacy)
+                    print(f"[event_log] Converted {count} events from {legacy} to {directory}")
+                except (ValueError, UnicodeDecodeError) as e:
+                    print(f"[event_log] Left {legacy} unconverted: {e}")
+            _logs[directory] = log
+    return log
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "convert":
+        sys.exit("usage: python -m lib.event_log convert <history.json>")
+    if not os.path.exists(os.path.expanduser(sys.argv[2])):
+        sys.exit(f"❌ File not found: {sys.argv[2]}")
+    log = EventLog(log_dir_for(sys.argv[2]))
+    print(f"✅ Converted {log.import_legacy(sys.argv[2])} events to {log.directory}")
@@ -0,0 +1,130 @@
+import os
+import time
+import queue
+import threading
+from collections import defaultdict, deque
+
+# Hedged requests: start the preferred provider, and if it hasn't produced a
+# first token within its observed p95 time-to-first-token, fire the next one.
+# The first complete response wins and the others are cancelled.
+HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))  # 0 = use the observed p95
+HEDGE_DEFAULT_THRESHOLD = float(os.getenv("LLM_HEDGE_DEFAULT_THRESHOLD", "2.0"))
+HEDGE_MIN_SAMPLES = 20
+
+HEDGE_STATS = {"requests": 0, "hedged": 0, "hedge_wins": 0, "wins": defaultdict(int), "failures": defaultdict(int)}
+_ttft_samples = defaultdict(lambda: deque(maxlen=200))
+_stats_lock = threading.Lock()
+
+
+class HedgeError(RuntimeError):
+    pass
+
+
+class StreamCancelled(Exception):
+    """Raised by a transport whose request was torn down because its hedge lost."""
+
+
+def record_ttft(name, seconds):
+    with _stats_lock:
+        _ttft_samples[name].append(seconds)
+
+
+def p95_ttft(name, default=HEDGE_DEFAULT_THRESHOLD):
+    with _stats_lock:
+        samples = sorted(_ttft_samples[name])
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return default
+    return samples[int(len(samples) * 0.95) - 1]
+
+
+def hedged_stream_call(candidates, hedge_after=None):
+    """
+    Runs (name, stream_fn) candidates in preference order and returns (name, text)
+    from the first one to finish. The next candidate is fired when the running ones
+    produce no first token within the hedge threshold, or when they all fail.
+    stream_fn(cancel) gets a threading.Event that is set when the candidate loses;
+    transports that take it abort the request even before the first token arrives.
+    """
+    if not candidates:
+        raise HedgeError("No providers to hedge across")
+
+    results = queue.Queue()
+    first_token = threading.Event()
+    cancelled = {}
+
+    def run(name, stream_fn):
+        start = time.perf_counter()
+        tokens = []
+        try:
+            stream = stream_fn(cancelled[name])
+            for token in stream:
+                if cancelled[name].is_set():
+                    if hasattr(stream, "close"):
+                        stream.close()
+                    return
+                if not tokens:
+                    record_ttft(name, time.perf_counter() - start)
+                    first_token.set()
+                tokens.append(token)
+            if not cancelled[name].is_set():
+                results.put((name, "".join(tokens), None))
+        except Exception as e:
+            if not cancelled[name].is_set():
+                results.put((name, None, e))
+
+    def fire(index):
+        name, stream_fn = candidates[index]
+        cancelled[name] = threading.Event()
+        threading.Thread(target=run, args=(name, stream_fn), daemon=True).start()
+
+    with _stats_lock:
+        HEDGE_STATS["requests"] += 1
+
+    fire(0)
+    next_index, running, errors = 1, 1, []
+    while running:
+        threshold = hedge_after or HEDGE_AFTER or p95_ttft(candidates[next_index - 1][0])
+        try:
+            name, text, error = results.get(timeout=None if first_token.is_set() else threshold)
+        except queue.Empty:
+            if next_index < len(candidates):
+                with _stats_lock:
+                    HEDGE_STATS["hedged"] += 1
+                fire(next_index)
+                next_index += 1
+                running += 1
+            continue
+
+        running -= 1
+        if error is None:
+            for other, event in cancelled.items():
+                if other != name:
+                    event.set()
+            with _stats_lock:
+                HEDGE_STATS["wins"][name] += 1
+                if name != candidates[0][0]:
+                    HEDGE_STATS["hedge_wins"] += 1
+            return name, text
+
+        errors.append(f"{name}: {error}")
+        with _stats_lock:
+            HEDGE_STATS["failures"][name] += 1
+        if not running and next_index < len(candidates):
+            fire(next_index)
+            next_index += 1
+            running += 1
+
+    raise HedgeError("All providers failed: " + "; ".join(errors))
+
+
+def hedge_stats() -> dict:
+    with _stats_lock:
+        requests = HEDGE_STATS["requests"]
+        return {
+            "requests": requests,
+            "hedged": HEDGE_STATS["hedged"],
+            "hedge_rate": round(HEDGE_STATS["hedged"] / requests, 3) if requests else 0.0,
+            "hedge_wins": HEDGE_STATS["hedge_wins"],
+            "wins": dict(HEDGE_STATS["wins"]),
+            "failures": dict(HEDGE_STATS["failures"]),
+        }
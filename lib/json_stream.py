@@ -0,0 +1,135 @@
+import json
+
+# Incremental parser for a streamed JSON object such as
+#   {"file": "x.py", "suggestions": [...], "fixes": [{"old": "...", "new": "..."}]}
+# Elements of the watched top-level arrays are emitted as soon as each one closes,
+# so callers can act on them while the rest of the response is still generating.
+# Text before the first "{" (e.g. a ```json fence) is ignored. If the stream is cut
+# off, result() returns whatever was complete.
+WHITESPACE = " \t\r\n"
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "start", "expect_key", "current_key", "index")
+
+    def __init__(self, kind, key, start):
+        self.kind = kind
+        self.key = key
+        self.start = start
+        self.expect_key = kind == "{"
+        self.current_key = None
+        self.index = 0
+
+
+class StreamingJSONParser:
+    def __init__(self, array_keys=("suggestions", "fixes")):
+        self.array_keys = set(array_keys)
+        self.text = ""
+        self.items = {key: [] for key in array_keys}
+        self.fields = {}
+        self.errors = 0
+        self.done = False
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._scalar_start = None
+        self._root_span = None
+        self._emitted = []
+
+    def feed(self, chunk) -> list:
+        """Consumes a chunk and returns the (key, item) pairs completed by it."""
+        self.text += chunk
+        text = self.text
+        for i in range(self._pos, len(text)):
+            if self.done:
+                break
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._string_closed(text[self._string_start:i + 1])
+                continue
+            if not self._stack:
+                if c == "{":
+                    self._stack.append(_Frame("{", None, i))
+                continue
+
+            if self._scalar_start is not None and (c in WHITESPACE or c in ",}]"):
+                self._value_closed(self._stack[-1], text[self._scalar_start:i])
+                self._scalar_start = None
+            if c in WHITESPACE or self._scalar_start is not None:
+                continue
+
+            frame = self._stack[-1]
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                key = frame.current_key if frame.kind == "{" else frame.index
+                self._stack.append(_Frame(c, key, i))
+            elif c in "}]":
+                closed = self._stack.pop()
+                if not self._stack:
+                    self._root_span = (closed.start, i + 1)
+                    self.done = True
+                else:
+                    self._value_closed(self._stack[-1], text[closed.start:i + 1])
+            elif c == ":":
+                frame.expect_key = False
+            elif c == ",":
+                if frame.kind == "{":
+                    frame.expect_key = True
+                else:
+                    frame.index += 1
+            else:
+                self._scalar_start = i
+        self._pos = len(text)
+        emitted, self._emitted = self._emitted, []
+        return emitted
+
+    def _string_closed(self, raw):
+        frame = self._stack[-1]
+        if frame.kind == "{" and frame.expect_key:
+            frame.current_key = json.loads(raw)
+        else:
+            self._value_closed(frame, raw)
+
+    def _value_closed(self, parent, raw):
+        depth = len(self._stack)
+        if depth == 1:
+            # A complete top-level field, e.g. "file"
+            try:
+                self.fields[parent.current_key] = json.loads(raw)
+            except ValueError:
+                self.errors += 1
+        elif depth == 2 and parent.kind == "[" and parent.key in self.array_keys:
+            try:
+                item = json.loads(raw)
+            except ValueError:
+                self.errors += 1
+                return
+            self.items[parent.key].append(item)
+            self._emitted.append((parent.key, item))
+
+    def iter_items(self, stream):
+        """Yields (key, item) pairs from a token stream as each array element closes."""
+        for chunk in stream:
+            yield from self.feed(chunk)
+
+    def result(self) -> dict:
+        """The parsed object; if the stream ended early, the complete fields and items so far."""
+        if self._root_span is not None:
+            try:
+                return json.loads(self.text[self._root_span[0]:self._root_span[1]])
+            except ValueError:
+                pass
+        partial = dict(self.fields)
+        partial.update(self.items)
+        partial["truncated"] = True
+        return partial
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+# On-disk prompt/response cache shared by every LLM entry point.
+# Entries are keyed by (provider, model, temperature, normalized prompt) so a
+# re-review of an unchanged file or a re-run of the same chain is served locally.
+CACHE_DIR = Path(os.path.expanduser(os.getenv("GRINGO_LLM_CACHE_DIR", "~/.gringoops/llm_cache")))
+CACHE_ENABLED = os.getenv("GRINGO_LLM_CACHE", "1") == "1"
+CACHE_TTL = float(os.getenv("GRINGO_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("GRINGO_LLM_CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_BYTES = int(os.getenv("GRINGO_LLM_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+EVICT_EVERY = 64  # writes between eviction sweeps
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Drops line-ending and trailing-whitespace noise that doesn't change the request."""
+    lines = prompt.replace("\r\n", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def cache_key(provider, model, temperature, prompt) -> str:
+    prompt_hash = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+    raw = json.dumps([provider, model, temperature, prompt_hash])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, cache_dir=CACHE_DIR, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count("misses")
+            return None
+
+        if time.time() - entry.get("created", 0) > self.ttl:
+            self._remove(path)
+            self._count("misses")
+            return None
+
+        # Touch the file so eviction treats it as recently used.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count("hits")
+        return entry["value"]
+
+    def set(self, key, value, meta=None):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"created": time.time(), "meta": meta or {}, "value": value}
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._writes += 1
+            sweep = self._writes % EVICT_EVERY == 0
+        if sweep:
+            self.evict()
+
+    def evict(self):
+        """Removes expired entries, then least recently used ones until under the size limits."""
+        now = time.time()
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        live = []
+        for mtime, size, path in entries:
+            if now - mtime > self.ttl:
+                self._remove(path)
+            else:
+                live.append((mtime, size, path))
+
+        live.sort()
+        total_bytes = sum(size for _, size, _ in live)
+        while live and (len(live) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = live.pop(0)
+            self._remove(path)
+            total_bytes -= size
+
+    def clear(self):
+        for path in self.cache_dir.glob("*/*.json"):
+            self._remove(path)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def _remove(self, path):
+        try:
+            path.unlink()
+            self._count("evictions")
+        except OSError:
+            pass
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> LLMCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache()
+    return _cache
+
+
+def cached_call(provider, model, temperature, prompt, fn, use_cache=True, refresh=False):
+    """
+    Returns the cached response for this request, or calls fn() and caches its result.
+    use_cache=False bypasses the cache entirely; refresh=True skips the lookup but stores the new result.
+    Only deterministic requests (temperature 0 or None) are cached; a sampled answer
+    is meant to differ on every call, so those always go to fn().
+    """
+    if not use_cache or not CACHE_ENABLED or temperature not in (None, 0):
+        return fn()
+
+    cache = get_cache()
+    key = cache_key(provider, model, temperature, prompt)
+    if not refresh:
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+    value = fn()
+    if value:
+        cache.set(key, value, {"provider": provider, "model": model, "temperature": temperature})
+    return value
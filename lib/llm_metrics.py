@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from lib.hedging import StreamCancelled
+
+# Telemetry for every model call: latency and time-to-first-token histograms,
+# token counts and error rates per provider/model. Exported as Prometheus text
+# on a local endpoint and appended to a rolling JSONL file for offline analysis.
+METRICS_PORT = int(os.getenv("LLM_METRICS_PORT", "9464"))
+METRICS_JSONL = os.path.expanduser(os.getenv("LLM_METRICS_JSONL", "~/.gringoops/llm_metrics.jsonl"))
+METRICS_JSONL_MAX_BYTES = int(os.getenv("LLM_METRICS_JSONL_MAX_BYTES", str(20 * 1024 * 1024)))
+METRICS_JSONL_BACKUPS = 3
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self, jsonl_path=METRICS_JSONL):
+        self.jsonl_path = jsonl_path
+        self.latency = defaultdict(Histogram)
+        self.ttft = defaultdict(Histogram)
+        self.requests = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.prompt_tokens = defaultdict(int)
+        self.completion_tokens = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, provider, model, latency, ttft=None, prompt_tokens=0, completion_tokens=0, error=None):
+        labels = (provider, model or "")
+        with self._lock:
+            self.requests[labels] += 1
+            self.latency[labels].observe(latency)
+            if ttft is not None:
+                self.ttft[labels].observe(ttft)
+            if error:
+                self.errors[labels] += 1
+            self.prompt_tokens[labels] += prompt_tokens or 0
+            self.completion_tokens[labels] += completion_tokens or 0
+        self._append_jsonl({
+            "timestamp": time.time(),
+            "provider": provider,
+            "model": model,
+            "latency": round(latency, 4),
+            "ttft": round(ttft, 4) if ttft is not None else None,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tokens_per_sec": round(completion_tokens / latency, 2) if completion_tokens and latency > 0 else None,
+            "error": f"{type(error).__name__}: {error}" if error else None,
+        })
+
+    def _append_jsonl(self, event):
+        if not self.jsonl_path:
+            return
+        line = json.dumps(event) + "\n"
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.jsonl_path), exist_ok=True)
+                if os.path.exists(self.jsonl_path) and os.path.getsize(self.jsonl_path) > METRICS_JSONL_MAX_BYTES:
+                    self._rotate()
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError as e:
+                print(f"[llm_metrics] Could not write {self.jsonl_path}: {e}")
+
+    def _rotate(self):
+        for i in range(METRICS_JSONL_BACKUPS - 1, 0, -1):
+            older = f"{self.jsonl_path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.jsonl_path}.{i + 1}")
+        os.replace(self.jsonl_path, f"{self.jsonl_path}.1")
+
+    def prometheus_text(self) -> str:
+        lines = []
+
+        def label_str(labels, extra=""):
+            provider, model = labels
+            return f'provider="{provider}",model="{model}"{extra}'
+
+        def histogram(name, help_text, series):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, hist in series.items():
+                cumulative = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    le = ',le="%s"' % bound
+                    lines.append(f"{name}_bucket{{{label_str(labels, le)}}} {cumulative}")
+                le = ',le="+Inf"'
+                lines.append(f"{name}_bucket{{{label_str(labels, le)}}} {hist.count}")
+                lines.append(f"{name}_sum{{{label_str(labels)}}} {hist.total}")
+                lines.append(f"{name}_count{{{label_str(labels)}}} {hist.count}")
+
+        def counter(name, help_text, series):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in series.items():
+                lines.append(f"{name}{{{label_str(labels)}}} {value}")
+
+        with self._lock:
+            histogram("llm_request_latency_seconds", "End-to-end model call latency.", self.latency)
+            histogram("llm_time_to_first_token_seconds", "Time until the first streamed token.", self.ttft)
+            counter("llm_requests_total", "Model calls.", self.requests)
+            counter("llm_errors_total", "Model calls that raised.", self.errors)
+            counter("llm_prompt_tokens_total", "Prompt tokens sent.", self.prompt_tokens)
+            counter("llm_completion_tokens_total", "Completion tokens received.", self.completion_tokens)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def estimate_tokens(text) -> int:
+    return len(text) // 4 + 1 if text else 0
+
+
+@contextmanager
+def track_call(provider, model, prompt=None):
+    """
+    Times a model call. Set call["completion"] (or the token counts) inside the block;
+    exceptions are recorded as errors and re-raised.
+    """
+    call = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": None, "completion": None, "ttft": None}
+    start = time.perf_counter()
+    error = None
+    try:
+        yield call
+    except (GeneratorExit, StreamCancelled):
+        # The consumer stopped reading a stream early, or a lost hedge was
+        # cancelled; neither is a failed call.
+        raise
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        completion_tokens = call["completion_tokens"]
+        if completion_tokens is None:
+            completion_tokens = estimate_tokens(call["completion"])
+        registry.record(provider, model, time.perf_counter() - start, ttft=call["ttft"],
+                        prompt_tokens=call["prompt_tokens"], completion_tokens=completion_tokens, error=error)
+
+
+def track_stream(provider, model, prompt, stream):
+    """Wraps a token iterator, recording time-to-first-token and streamed token count."""
+    with track_call(provider, model, prompt) as call:
+        start = time.perf_counter()
+        call["completion_tokens"] = 0
+        try:
+            for token in stream:
+                if call["ttft"] is None:
+                    call["ttft"] = time.perf_counter() - start
+                call["completion_tokens"] += 1
+                yield token
+        finally:
+            if hasattr(stream, "close"):
+                stream.close()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = registry.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT, host="127.0.0.1"):
+    """Serves /metrics in Prometheus text format on a background thread (once per process)."""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            print(f"[llm_metrics] Metrics endpoint not started on port {port}: {e}")
+            return None
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+        print(f"[llm_metrics] Serving metrics on http://{host}:{port}/metrics")
+        return _server
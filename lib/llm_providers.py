@@ -0,0 +1,134 @@
+import os
+import threading
+from lib.keychain import get_key
+from lib.clients import get_openai_client, get_gemini_model
+
+# Provider plugins for lib/llm_router. Importing this module is cheap: each
+# provider imports its SDK and resolves its API key (env var first, then the
+# macOS Keychain) only the first time it is actually used.
+_UNRESOLVED = object()
+
+
+class Provider:
+    name = None
+    default_model = None
+    key_service = None  # Keychain service name
+    key_env = None      # Environment variable checked before the Keychain
+
+    def __init__(self):
+        self._key = _UNRESOLVED
+        self._lock = threading.Lock()
+
+    @property
+    def key(self):
+        if self._key is _UNRESOLVED:
+            with self._lock:
+                if self._key is _UNRESOLVED:
+                    self._key = self._resolve_key()
+        return self._key
+
+    def _resolve_key(self):
+        if self.key_env and os.getenv(self.key_env):
+            return os.getenv(self.key_env)
+        try:
+            return get_key(self.key_service)
+        except (RuntimeError, OSError):
+            return None
+
+    def configured(self) -> bool:
+        return bool(self.key)
+
+    def errors(self) -> tuple:
+        """SDK exception types that complete_prompt reports as errors instead of raising."""
+        return ()
+
+    def complete(self, prompt, model) -> dict:
+        """Returns {"content": text, "usage": dict or None}."""
+        raise NotImplementedError
+
+    def stream(self, prompt, model):
+        raise NotImplementedError
+
+
+class OpenAIProvider(Provider):
+    name = "openai"
+    default_model = "gpt-4-turbo"
+    key_service = "openai"
+    key_env = "OPENAI_API_KEY"
+
+    def errors(self):
+        try:
+            import openai.error
+            return (openai.error.OpenAIError,)
+        except ImportError:
+            import openai
+            return (openai.OpenAIError,)
+
+    def complete(self, prompt, model):
+        response = get_openai_client(self.key).chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        usage = response.usage
+        return {
+            "content": response.choices[0].message.content,
+            "usage": {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens} if usage else None,
+        }
+
+    def stream(self, prompt, model):
+        response = get_openai_client(self.key).chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class GeminiProvider(Provider):
+    name = "gemini"
+    default_model = "gemini-pro"
+    key_service = "gemini"
+    key_env = "GEMINI_API_KEY"
+
+    def errors(self):
+        import google.api_core.exceptions
+        return (google.api_core.exceptions.GoogleAPIError,)
+
+    def complete(self, prompt, model):
+        response = get_gemini_model(model, self.key).generate_content(prompt)
+        return {"content": response.text, "usage": getattr(response, "token_usage", None)}
+
+    def stream(self, prompt, model):
+        for chunk in get_gemini_model(model, self.key).generate_content(prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+
+# Registration order is routing preference order
+_provider_classes = {}
+_providers = {}
+_registry_lock = threading.Lock()
+
+
+def register_provider(cls):
+    _provider_classes[cls.name] = cls
+    return cls
+
+
+def get_provider(name) -> Provider:
+    with _registry_lock:
+        if name not in _providers:
+            if name not in _provider_classes:
+                raise KeyError(f"Unknown provider: {name}")
+            _providers[name] = _provider_classes[name]()
+        return _providers[name]
+
+
+def provider_names() -> list:
+    return list(_provider_classes)
+
+
+register_provider(OpenAIProvider)
+register_provider(GeminiProvider)
@@ -1,83 +1,244 @@
 import os
 import time
-from keychain import get_key
-from voicestrip import speak_response
-import openai.error
-import google.api_core.exceptions
+import re
+import queue
+import asyncio
+import weakref
+import sys
+import threading
+from pathlib import Path
+from collections import deque
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # Adds GringoOps root to PYTHONPATH
+from lib.llm_cache import cached_call
+from lib.hedging import hedged_stream_call, HedgeError
+from lib.resilience import call_with_resilience, is_available, ResilienceError
+from lib.llm_metrics import track_call, track_stream
+from lib.cassette import cassette_call, cassette_stream
+from lib.llm_providers import get_provider, provider_names
+
+# Provider SDKs, API keys, the local Ollama client and VoiceStrip are all loaded on
+# first use (see lib/llm_providers.py), so importing the router stays cheap.
+
+def speak_response(text):
+    from voicestrip import speak_response as voicestrip_speak
+    voicestrip_speak(text)
 
 # Detect which LLM provider to use
-OPENAI_KEY = get_key("openai")
-GEMINI_KEY = get_key("gemini")
+def use_provider():
+    configured = [p for p in provider_names() if get_provider(p).configured()]
+    # Route around providers whose circuit breaker is open
+    for provider in configured:
+        if is_available(provider):
+            return provider
+    return configured[0] if configured else None
+
+# Max in-flight requests per provider for the async router
+PROVIDER_CONCURRENCY = {
+    "openai": int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+    "gemini": int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+}
 
 # Sends prompt to the selected LLM and optionally speaks the result aloud using Gringo VoiceStrip.
-def use_provider():
-    if OPENAI_KEY:
-        return "openai"
-    elif GEMINI_KEY:
-        return "gemini"
-    else:
-        return None
-
-def send_prompt(prompt, model="gpt-4"):
-    provider = use_provider()
-    if provider == "openai":
-        import openai
-        openai.api_key = OPENAI_KEY
-        try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4-turbo",
-                messages=[{"role": "user", "content": prompt}]
-            )
-            result = response.choices[0].message.content.strip()
-            token_usage = response.usage if hasattr(response, 'usage') else None
-            speak_response(result)
-            return {
-                "result": result,
-                "provider": "openai",
-                "model": "gpt-4-turbo",
-                "token_usage": token_usage,
-                "timestamp": time.time()
-            }
-        except openai.error.OpenAIError as e:
-            return {
-                "error": str(e),
-                "provider": "openai",
-                "model": "gpt-4-turbo",
-                "timestamp": time.time()
-            }
-
-    elif provider == "gemini":
-        import google.generativeai as genai
-        genai.configure(api_key=GEMINI_KEY)
-        try:
-            model = genai.GenerativeModel("gemini-pro")
-            response = model.generate_content(prompt)
-            result = response.text.strip()
-            token_usage = None
-            if hasattr(response, 'token_usage'):
-                token_usage = response.token_usage
-            speak_response(result)
-            return {
-                "result": result,
-                "provider": "gemini",
-                "model": "gemini-pro",
-                "token_usage": token_usage,
-                "timestamp": time.time()
-            }
-        except google.api_core.exceptions.GoogleAPIError as e:
-            return {
-                "error": str(e),
-                "provider": "gemini",
-                "model": "gemini-pro",
-                "timestamp": time.time()
-            }
-
-    else:
+def send_prompt(prompt, model="gpt-4", use_cache=True, refresh_cache=False):
+    response = complete_prompt(prompt, use_provider(), use_cache=use_cache, refresh_cache=refresh_cache)
+    if "result" in response:
+        speak_response(response["result"])
+    return response
+
+# Runs the prompt against a single provider without speaking the result.
+def complete_prompt(prompt, provider, use_cache=True, refresh_cache=False):
+    if provider not in provider_names():
         return {
             "error": "❌ No API key found for OpenAI or Gemini.",
             "timestamp": time.time()
         }
 
+    plugin = get_provider(provider)
+    model = plugin.default_model
+    provider_errors = plugin.errors()
+    try:
+        token_usage = None
+        cached = True
+
+        def call_model():
+            nonlocal token_usage, cached
+            with track_call(provider, model, prompt) as call:
+                response = cassette_call(provider, {"model": model, "prompt": prompt},
+                                         lambda: plugin.complete(prompt, model))
+                cached = False
+                token_usage = response["usage"]
+                call["completion"] = response["content"]
+                if isinstance(token_usage, dict):
+                    call["prompt_tokens"] = token_usage.get("prompt_tokens", call["prompt_tokens"])
+                    call["completion_tokens"] = token_usage.get("completion_tokens")
+            return call["completion"].strip()
+
+        result = cached_call(provider, model, None, prompt,
+                             lambda: call_with_resilience(provider, call_model),
+                             use_cache=use_cache, refresh=refresh_cache)
+        return {
+            "result": result,
+            "provider": provider,
+            "model": model,
+            "token_usage": token_usage,
+            "cached": cached,
+            "timestamp": time.time()
+        }
+    except provider_errors + (ResilienceError,) as e:
+        return {
+            "error": str(e),
+            "provider": provider,
+            "model": model,
+            "timestamp": time.time()
+        }
+
+# --- Async router ---
+
+_semaphores = weakref.WeakKeyDictionary()
+
+def _provider_semaphore(provider):
+    # asyncio semaphores are bound to one event loop, so keep a set per loop.
+    loop = asyncio.get_running_loop()
+    per_loop = _semaphores.setdefault(loop, {})
+    if provider not in per_loop:
+        per_loop[provider] = asyncio.Semaphore(PROVIDER_CONCURRENCY.get(provider, 4))
+    return per_loop[provider]
+
+async def send_prompt_async(prompt, model="gpt-4", speak=False, use_cache=True, refresh_cache=False):
+    provider = use_provider()
+    async with _provider_semaphore(provider):
+        response = await asyncio.to_thread(complete_prompt, prompt, provider, use_cache, refresh_cache)
+    if speak and "result" in response:
+        await asyncio.to_thread(speak_response, response["result"])
+    return response
+
+async def send_many(prompts, model="gpt-4", speak=False, use_cache=True):
+    """
+    Sends all prompts concurrently (bounded per provider) and returns one result
+    dict per prompt, in input order. Failed prompts carry an "error" key instead
+    of raising, so one bad request doesn't sink the batch.
+    """
+    outcomes = await asyncio.gather(
+        *(send_prompt_async(p, model=model, speak=speak, use_cache=use_cache) for p in prompts),
+        return_exceptions=True
+    )
+    results = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, BaseException):
+            outcome = {"error": str(outcome), "timestamp": time.time()}
+        outcome["index"] = index
+        results.append(outcome)
+
+    failed = [r["index"] for r in results if "error" in r]
+    if failed:
+        print(f"[llm_router] {len(failed)}/{len(results)} prompts failed: {failed}")
+    return results
+
+def send_many_sync(prompts, **kwargs):
+    return asyncio.run(send_many(prompts, **kwargs))
+
+# --- Streaming ---
+
+DEFAULT_MODELS = {"openai": "gpt-4-turbo", "gemini": "gemini-pro", "local": "mistral"}
+# Per-call streaming metrics, newest last
+STREAM_METRICS = deque(maxlen=500)
+
+def _provider_stream(prompt, provider, model, cancel=None):
+    if provider == "local":
+        # The Ollama client records its own metrics, and aborts its request when cancel is set
+        from lib.ollama_client import stream_generate
+        return stream_generate(prompt, model=model, cancel=cancel)
+    return track_stream(provider, model, prompt, _api_stream(prompt, provider, model))
+
+def _api_stream(prompt, provider, model):
+    return cassette_stream(provider, {"model": model, "prompt": prompt, "stream": True},
+                           lambda: get_provider(provider).stream(prompt, model))
+
+class _SentenceSpeaker:
+    """Speaks complete sentences on a background thread while tokens keep streaming."""
+    SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+    def __init__(self):
+        self.buffer = ""
+        self.sentences = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            sentence = self.sentences.get()
+            if sentence is None:
+                return
+            speak_response(sentence)
+
+    def feed(self, token):
+        self.buffer += token
+        *complete, self.buffer = self.SENTENCE_END.split(self.buffer)
+        for sentence in complete:
+            if sentence.strip():
+                self.sentences.put(sentence.strip())
+
+    def close(self):
+        if self.buffer.strip():
+            self.sentences.put(self.buffer.strip())
+        self.sentences.put(None)
+
+def stream_prompt(prompt, provider=None, model=None, speak=False, cancel=None):
+    """
+    Yields response tokens as the provider produces them.
+    Falls back to the local Ollama model when no API key is configured.
+    Time-to-first-token and tokens/sec for the call are appended to STREAM_METRICS;
+    token counts are streamed chunks, which is one token per chunk for OpenAI and Ollama.
+    Setting cancel (a threading.Event) aborts a local request even before its first token.
+    """
+    provider = provider or use_provider() or "local"
+    model = model or DEFAULT_MODELS.get(provider)
+    speaker = _SentenceSpeaker() if speak else None
+    stats = {"provider": provider, "model": model, "ttft": None, "tokens": 0, "error": None, "timestamp": time.time()}
+    start = time.perf_counter()
+    try:
+        for token in _provider_stream(prompt, provider, model, cancel):
+            if stats["ttft"] is None:
+                stats["ttft"] = time.perf_counter() - start
+            stats["tokens"] += 1
+            if speaker:
+                speaker.feed(token)
+            yield token
+    except Exception as e:
+        stats["error"] = str(e)
+        raise
+    finally:
+        if speaker:
+            speaker.close()
+        stats["duration"] = time.perf_counter() - start
+        generation_time = stats["duration"] - (stats["ttft"] or 0)
+        stats["tokens_per_sec"] = round(stats["tokens"] / generation_time, 2) if generation_time > 0 else 0.0
+        STREAM_METRICS.append(stats)
+
+def last_stream_metrics():
+    return STREAM_METRICS[-1] if STREAM_METRICS else None
+
+# --- Hedged requests ---
+
+def send_prompt_hedged(prompt, providers=None, hedge_after=None):
+    """
+    Races providers for the fastest complete answer. The primary starts alone; a backup
+    is fired only if the primary misses its p95 time-to-first-token (or hedge_after seconds).
+    Hedge rate and wins are tracked in hedging.HEDGE_STATS.
+    """
+    if providers is None:
+        providers = [p for p in provider_names() if get_provider(p).configured()] + ["local"]
+    candidates = [(p, lambda cancel, p=p: stream_prompt(prompt, provider=p, cancel=cancel)) for p in providers]
+    try:
+        provider, result = hedged_stream_call(candidates, hedge_after=hedge_after)
+    except HedgeError as e:
+        return {"error": str(e), "timestamp": time.time()}
+    return {
+        "result": result.strip(),
+        "provider": provider,
+        "model": DEFAULT_MODELS.get(provider),
+        "timestamp": time.time()
+    }
+
 # Example usage
 if __name__ == "__main__":
     print(send_prompt("Explain how a gearbox works."))
\ No newline at end of file
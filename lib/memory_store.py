@@ -0,0 +1,256 @@
+import os
+import sys
+import json
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+
+# Unified agent memory in one SQLite database (WAL mode, so dashboards can read
+# while agents write). Every record has indexed timestamp/event/agent/session
+# columns plus a free-form JSON payload, so "latest 10 for FredFix" or "this
+# session's events" are index seeks instead of parsing a whole history file.
+# Timestamps are stored as timezone-aware UTC ISO strings so they sort and
+# compare correctly; naive timestamps passed in are taken as local time.
+#
+#   store = get_memory_store()
+#   store.record("command", {"command": "hello", "result": "👋"}, agent="FredFix")
+#   store.latest(10, agent="FredFix")
+#   store.query(start="2025-07-01", end="2025-08-01", event="cleaned")
+#
+# Old history files can be loaded with: python -m lib.memory_store import <file> --agent <name>
+DB_PATH = os.path.expanduser(os.getenv("GRINGO_MEMORY_DB", "~/.gringoops/memory.db"))
+BUSY_TIMEOUT_MS = int(os.getenv("GRINGO_MEMORY_BUSY_TIMEOUT_MS", "5000"))
+FILTER_COLUMNS = ("event", "agent", "session")
+# Matches the partial index below word for word, so verified lookups can use it
+VERIFIED_CLAUSE = "json_extract(payload, '$.verified') = 1"
+# Keys lifted out of imported records into columns; everything else stays in the payload
+TIMESTAMP_KEYS = ("timestamp", "ts", "time")
+AGENT_KEYS = ("agent", "app", "agent_name")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    event TEXT,
+    agent TEXT,
+    session TEXT,
+    payload TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_memory_ts ON memory (ts);
+CREATE INDEX IF NOT EXISTS idx_memory_event_ts ON memory (event, ts);
+CREATE INDEX IF NOT EXISTS idx_memory_agent_ts ON memory (agent, ts);
+CREATE INDEX IF NOT EXISTS idx_memory_session_ts ON memory (session, ts);
+""" + f"CREATE INDEX IF NOT EXISTS idx_memory_verified ON memory (agent, ts) WHERE {VERIFIED_CLAUSE};\n"
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def to_utc(timestamp) -> str:
+    """ISO string or datetime -> UTC ISO string; naive values are local time."""
+    if timestamp is None:
+        return _now()
+    if not isinstance(timestamp, datetime):
+        try:
+            timestamp = datetime.fromisoformat(str(timestamp))
+        except ValueError:
+            return str(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.astimezone()
+    return timestamp.astimezone(timezone.utc).isoformat()
+
+
+def _row(row) -> dict:
+    return {
+        "id": row[0],
+        "timestamp": row[1],
+        "event": row[2],
+        "agent": row[3],
+        "session": row[4],
+        "data": json.loads(row[5]),
+    }
+
+
+class MemoryStore:
+    def __init__(self, path=DB_PATH):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # sqlite3 connections belong to the thread that opened them; Streamlit
+        # serves sessions from several threads, so each gets its own.
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    def record(self, event, data=None, agent=None, session=None, timestamp=None) -> int:
+        """Appends one record and returns its id."""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO memory (ts, event, agent, session, payload) VALUES (?, ?, ?, ?, ?)",
+                (to_utc(timestamp), event, agent, session, json.dumps(data or {}, default=str, ensure_ascii=False))
+            )
+        return cursor.lastrowid
+
+    def record_many(self, records) -> int:
+        """Inserts (timestamp, event, agent, session, data) tuples in one transaction."""
+        rows = ((to_utc(ts), event, agent, session, json.dumps(data or {}, default=str, ensure_ascii=False))
+                for ts, event, agent, session, data in records)
+        conn = self._connect()
+        with conn:
+            cursor = conn.executemany(
+                "INSERT INTO memory (ts, event, agent, session, payload) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        return cursor.rowcount
+
+    @staticmethod
+    def _where(start=None, end=None, verified=None, **filters):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(to_utc(start))
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(to_utc(end))
+        if verified:
+            clauses.append(VERIFIED_CLAUSE)
+        for column, value in filters.items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Unknown filter: {column}")
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, start=None, end=None, limit=None, newest_first=False, **filters) -> list:
+        """
+        Records with start <= timestamp < end matching the event/agent/session
+        filters, oldest first unless newest_first. verified=True keeps records
+        whose payload has "verified": true.
+        """
+        where, params = self._where(start, end, **filters)
+        order = "DESC" if newest_first else "ASC"
+        sql = f"SELECT id, ts, event, agent, session, payload FROM memory{where} ORDER BY ts {order}, id {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [_row(r) for r in self._connect().execute(sql, params)]
+
+    def range(self, start, end=None, **filters) -> list:
+        return self.query(start=start, end=end, **filters)
+
+    def latest(self, n=10, **filters) -> list:
+        """The newest n matching records, oldest first."""
+        return list(reversed(self.query(limit=n, newest_first=True, **filters)))
+
+    def count(self, start=None, end=None, **filters) -> int:
+        where, params = self._where(start, end, **filters)
+        return self._connect().execute(f"SELECT COUNT(*) FROM memory{where}", params).fetchone()[0]
+
+    def delete(self, start=None, end=None, **filters) -> int:
+        where, params = self._where(start, end, **filters)
+        if not where:
+            raise ValueError("Refusing to delete every record; pass a filter")
+        conn = self._connect()
+        with conn:
+            return conn.execute(f"DELETE FROM memory{where}", params).rowcount
+
+    def import_records(self, records, agent=None, event=None) -> int:
+        """Loads dicts from an old history file, lifting timestamp/event/agent/session into columns."""
+        def rows():
+            for record in records:
+                if not isinstance(record, dict):
+                    record = {"value": record}
+                data = dict(record)
+                ts = next((data.pop(k) for k in TIMESTAMP_KEYS if k in data), None)
+                row_agent = next((data.pop(k) for k in AGENT_KEYS if k in data), None) or agent
+                yield (str(ts) if ts else None, data.pop("event", None) or event,
+                       row_agent, data.pop("session", None), data)
+        return self.record_many(rows())
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_memory_store(path=DB_PATH) -> MemoryStore:
+    """Process-wide store for a database path."""
+    path = os.path.expanduser(str(path))
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = MemoryStore(path)
+    return store
+
+
+def _read_history(path):
+    """Records from a JSON array, a JSONL file or an event-log directory, streamed."""
+    from lib.event_log import EventLog, iter_json_array
+    path = Path(os.path.expanduser(str(path)))
+    if path.is_dir():
+        yield from EventLog(path)
+        return
+    with open(path, encoding="utf-8") as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from iter_json_array(f)
+            return
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GringoOps memory store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Load a JSON/JSONL history file or event-log directory")
+    imp.add_argument("path")
+    imp.add_argument("--agent")
+    imp.add_argument("--event", help="Event name for records that have none")
+    imp.add_argument("--db", default=DB_PATH)
+    show = sub.add_parser("latest", help="Print the newest records")
+    show.add_argument("-n", type=int, default=10)
+    for column in FILTER_COLUMNS:
+        show.add_argument(f"--{column}")
+    show.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    store = get_memory_store(args.db)
+    if args.command == "import":
+        if not os.path.exists(os.path.expanduser(args.path)):
+            sys.exit(f"❌ File not found: {args.path}")
+        count = store.import_records(_read_history(args.path), agent=args.agent, event=args.event)
+        print(f"✅ Imported {count} records from {args.path} into {store.path}")
+    else:
+        filters = {c: getattr(args, c) for c in FILTER_COLUMNS}
+        for record in store.latest(args.n, **filters):
+            print(json.dumps(record, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import os
+import json
+import socket
+import threading
+import http.client
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from lib.llm_metrics import track_call, track_stream
+from lib.cassette import cassette_call, cassette_stream
+from lib.hedging import StreamCancelled
+
+# Shared client for the local Ollama HTTP API.
+# Replaces forking `ollama run <model>` per prompt: one keep-alive connection
+# pool is reused by every caller in the process.
+#
+# Context shared by a run of prompts (e.g. a chain's mission block) goes in the
+# `system` field with the per-step text in `prompt`. The chat template renders
+# system first, so consecutive steps start with the same tokens and the runner
+# reuses that prefix from its KV cache; only the step text is evaluated again.
+# The reuse shows up as a smaller prompt_eval_count (generate records it as the
+# call's prompt_tokens).
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "300"))
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "10m")
+DEFAULT_MODEL = "mistral"
+CANCEL_POLL_INTERVAL = 0.05
+
+
+class OllamaError(RuntimeError):
+    pass
+
+
+class OllamaClient:
+    def __init__(self, host=OLLAMA_HOST, max_concurrency=OLLAMA_MAX_CONCURRENCY, timeout=OLLAMA_TIMEOUT):
+        if not host.startswith("http"):
+            host = f"http://{host}"
+        self.host = host.rstrip("/")
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        # Bounds in-flight requests so a burst of prompts queues here instead of
+        # piling up on the inference box.
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _payload(self, prompt, model, stream, options=None, **extra):
+        payload = {
+            "model": model or DEFAULT_MODEL,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+        }
+        if options:
+            payload["options"] = options
+        payload.update({k: v for k, v in extra.items() if v is not None})
+        return payload
+
+    def generate(self, prompt: str, model: str = None, options: dict = None, **extra) -> str:
+        """Run a prompt to completion and return the generated text."""
+        payload = self._payload(prompt, model, False, options, **extra)
+        with self._slots, track_call("ollama", payload["model"], prompt) as call:
+            data = self._post(payload)
+            call["prompt_tokens"] = data.get("prompt_eval_count", call["prompt_tokens"])
+            call["completion_tokens"] = data.get("eval_count")
+            call["completion"] = data.get("response", "")
+        return call["completion"].strip()
+
+    def stream(self, prompt: str, model: str = None, options: dict = None, cancel=None, **extra):
+        """
+        Yield response tokens as Ollama produces them. Setting cancel (a
+        threading.Event) tears the request down, even while it is still queued.
+        """
+        payload = self._payload(prompt, model, True, options, **extra)
+        return track_stream("ollama", payload["model"], prompt,
+                            cassette_stream("ollama", payload, lambda: self._stream(payload, cancel)))
+
+    def _post(self, payload) -> dict:
+        def request():
+            try:
+                response = self.session.post(f"{self.host}/api/generate", json=payload, timeout=self.timeout)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                raise OllamaError(f"Ollama request failed: {e}") from e
+            return response.json()
+        return cassette_call("ollama", payload, request)
+
+    def _stream(self, payload, cancel=None):
+        if cancel is not None:
+            yield from self._cancellable_stream(payload, cancel)
+            return
+        with self._slots:
+            try:
+                response = self.session.post(f"{self.host}/api/generate", json=payload, timeout=self.timeout, stream=True)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                raise OllamaError(f"Ollama request failed: {e}") from e
+            try:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise OllamaError(chunk["error"])
+                    token = chunk.get("response", "")
+                    if token:
+                        yield token
+                    if chunk.get("done"):
+                        break
+            finally:
+                response.close()
+
+    def _cancellable_stream(self, payload, cancel):
+        """
+        Streams over a dedicated connection that a watcher shuts down once cancel
+        is set. A saturated Ollama sends nothing until the request is scheduled,
+        so checking between tokens would hold the slot and the request until then;
+        dropping the socket frees both and lets Ollama abandon the generation.
+        """
+        while not self._slots.acquire(timeout=CANCEL_POLL_INTERVAL):
+            if cancel.is_set():
+                raise StreamCancelled("Cancelled while waiting for an Ollama slot")
+        url = urlsplit(self.host)
+        connection_cls = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        connection = connection_cls(url.hostname, url.port, timeout=self.timeout)
+        finished = threading.Event()
+
+        def watch():
+            while not finished.wait(CANCEL_POLL_INTERVAL):
+                if cancel.is_set() and connection.sock is not None:
+                    try:
+                        connection.sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+                    return
+
+        threading.Thread(target=watch, daemon=True).start()
+        try:
+            if cancel.is_set():
+                raise StreamCancelled("Cancelled before the Ollama request was sent")
+            connection.request("POST", f"{url.path.rstrip('/')}/api/generate", body=json.dumps(payload),
+                               headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            if response.status >= 400:
+                raise OllamaError(f"Ollama request failed: {response.status} {response.read(500)!r}")
+            for line in response:
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise OllamaError(chunk["error"])
+                token = chunk.get("response", "")
+                if token:
+                    yield token
+                if chunk.get("done"):
+                    return
+            if cancel.is_set():
+                raise StreamCancelled("Ollama request cancelled")
+        except (StreamCancelled, OllamaError):
+            raise
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            if cancel.is_set():
+                raise StreamCancelled("Ollama request cancelled") from e
+            raise OllamaError(f"Ollama request failed: {e}") from e
+        finally:
+            finished.set()
+            connection.close()
+            self._slots.release()
+
+    def list_models(self) -> list:
+        response = self.session.get(f"{self.host}/api/tags", timeout=self.timeout)
+        response.raise_for_status()
+        return [m["name"] for m in response.json().get("models", [])]
+
+    def running_models(self) -> list:
+        """Models currently loaded in memory, without the ':latest' tag."""
+        response = self.session.get(f"{self.host}/api/ps", timeout=10)
+        response.raise_for_status()
+        return [m["name"].removesuffix(":latest") for m in response.json().get("models", [])]
+
+    def load(self, model: str, keep_alive=OLLAMA_KEEP_ALIVE):
+        # An empty prompt loads the model (or refreshes its keep-alive) without generating.
+        response = self.session.post(
+            f"{self.host}/api/generate",
+            json={"model": model, "prompt": "", "keep_alive": keep_alive},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+    def unload(self, model: str):
+        self.load(model, keep_alive=0)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OllamaClient:
+    """Returns the process-wide Ollama client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OllamaClient()
+    return _client
+
+
+def generate(prompt: str, model: str = None, **kwargs) -> str:
+    return get_client().generate(prompt, model=model, **kwargs)
+
+
+def stream_generate(prompt: str, model: str = None, **kwargs):
+    return get_client().stream(prompt, model=model, **kwargs)
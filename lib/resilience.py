@@ -0,0 +1,221 @@
+import os
+import time
+import random
+import threading
+
+# Shared resilience layer for LLM provider calls:
+#   - a token bucket per provider whose rate backs off on 429s and recovers on success
+#   - bounded retries with full-jitter exponential backoff for transient errors
+#   - a circuit breaker per provider that fails fast while the provider is down
+DEFAULT_RATES = {"openai": 5.0, "gemini": 2.0, "ollama": 20.0}  # requests/sec
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "30.0"))
+BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30.0"))
+
+THROTTLE_MARKERS = ("RateLimit", "ResourceExhausted", "TooManyRequests")
+TRANSIENT_MARKERS = ("Timeout", "APIConnection", "ServiceUnavailable", "InternalServer",
+                     "DeadlineExceeded", "ConnectionError", "Unavailable")
+
+
+class ResilienceError(RuntimeError):
+    pass
+
+
+class CircuitOpenError(ResilienceError):
+    pass
+
+
+class RetriesExhaustedError(ResilienceError):
+    pass
+
+
+class AdaptiveTokenBucket:
+    def __init__(self, rate, burst=None, min_rate=0.1):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_throttle(self):
+        # Multiplicative decrease when the provider says we're going too fast
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+
+    def on_success(self):
+        # Additive increase back toward the configured rate
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started = None  # set while the half-open trial call is in flight
+        self._lock = threading.Lock()
+
+    def _state(self, now):
+        if self.opened_at is None:
+            return "closed"
+        if now - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def _probe_in_flight(self, now):
+        # A probe whose caller never reported back expires after reset_timeout
+        return self.probe_started is not None and now - self.probe_started < self.reset_timeout
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def available(self) -> bool:
+        """True if allow() would let a call through right now; doesn't claim the probe."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            return state == "closed" or (state == "half_open" and not self._probe_in_flight(now))
+
+    def allow(self) -> bool:
+        """
+        Closed lets every call through. Half-open lets exactly one probe through;
+        other callers are rejected until the probe records success or failure.
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            if state == "closed":
+                return True
+            if state == "open" or self._probe_in_flight(now):
+                return False
+            self.probe_started = now
+            return True
+
+    def release_probe(self):
+        """Frees the half-open probe slot without changing state (the call told us nothing)."""
+        with self._lock:
+            self.probe_started = None
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+            self.probe_started = None
+
+
+def _status_code(exc):
+    for attr in ("status_code", "http_status", "code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_throttle(exc) -> bool:
+    return _status_code(exc) == 429 or any(m in type(exc).__name__ for m in THROTTLE_MARKERS)
+
+
+def is_transient(exc) -> bool:
+    if is_throttle(exc):
+        return True
+    status = _status_code(exc)
+    if isinstance(status, int) and status >= 500:
+        return True
+    return isinstance(exc, (TimeoutError, ConnectionError)) or any(m in type(exc).__name__ for m in TRANSIENT_MARKERS)
+
+
+def _retry_after(exc):
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+_limiters = {}
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def get_limiter(provider) -> AdaptiveTokenBucket:
+    with _registry_lock:
+        if provider not in _limiters:
+            rate = float(os.getenv(f"LLM_RATE_{provider.upper()}", DEFAULT_RATES.get(provider, 5.0)))
+            _limiters[provider] = AdaptiveTokenBucket(rate)
+        return _limiters[provider]
+
+
+def get_breaker(provider) -> CircuitBreaker:
+    with _registry_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker()
+        return _breakers[provider]
+
+
+def is_available(provider) -> bool:
+    return get_breaker(provider).available()
+
+
+def call_with_resilience(provider, fn, max_retries=MAX_RETRIES, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+    """
+    Calls fn() under the provider's rate limit, retrying transient failures with jittered backoff.
+    Raises CircuitOpenError without calling fn() while the provider's breaker is open.
+    Non-transient errors (bad request, auth) are raised immediately.
+    """
+    breaker = get_breaker(provider)
+    limiter = get_limiter(provider)
+    for attempt in range(max_retries + 1):
+        if not breaker.allow():
+            raise CircuitOpenError(f"{provider} circuit is open; failing fast")
+        limiter.acquire()
+        try:
+            result = fn()
+        except Exception as e:
+            if not is_transient(e):
+                # A bad request says nothing about the provider's health
+                breaker.release_probe()
+                raise
+            breaker.record_failure()
+            if is_throttle(e):
+                limiter.on_throttle()
+            if attempt == max_retries:
+                raise RetriesExhaustedError(f"{provider} failed after {attempt + 1} attempts: {e}") from e
+            delay = _retry_after(e) or random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            print(f"[resilience] {provider} {type(e).__name__}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+        else:
+            breaker.record_success()
+            limiter.on_success()
+            return result
@@ -0,0 +1,125 @@
+import json
+import hashlib
+import threading
+
+# Process-wide request coalescing for model calls.
+# Streamlit runs every browser session in the same process, so when several
+# users press the same button at once the identical prompts share one upstream
+# call. Streaming joiners first replay what has already been generated, then
+# follow the live stream.
+
+
+class _Flight:
+    def __init__(self):
+        self.tokens = []
+        self.result = None
+        self.error = None
+        self.done = False
+        self.cond = threading.Condition()
+
+    def finish(self, result=None, error=None):
+        with self.cond:
+            self.result = result
+            self.error = error
+            self.done = True
+            self.cond.notify_all()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            return flight, leader
+
+    def _forget(self, key, flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def do(self, key, fn):
+        """Runs fn() once for all concurrent callers with the same key and returns its result to each."""
+        flight, leader = self._join(key)
+        if leader:
+            try:
+                result = fn()
+            except BaseException as e:
+                flight.finish(error=e)
+                raise
+            else:
+                flight.finish(result=result)
+                return result
+            finally:
+                self._forget(key, flight)
+
+        with flight.cond:
+            while not flight.done:
+                flight.cond.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def stream(self, key, stream_fn):
+        """
+        Yields the tokens of stream_fn() for every concurrent caller with the same key.
+        The upstream stream is consumed on its own thread so it keeps going if the
+        session that started it goes away.
+        """
+        flight, leader = self._join(key)
+        if leader:
+            threading.Thread(target=self._produce, args=(key, flight, stream_fn), daemon=True).start()
+
+        position = 0
+        while True:
+            with flight.cond:
+                while position >= len(flight.tokens) and not flight.done:
+                    flight.cond.wait()
+                pending = flight.tokens[position:]
+                finished = flight.done
+                error = flight.error
+            for token in pending:
+                yield token
+            position += len(pending)
+            if finished and position >= len(flight.tokens):
+                if error is not None:
+                    raise error
+                return
+
+    def _produce(self, key, flight, stream_fn):
+        try:
+            for token in stream_fn():
+                with flight.cond:
+                    flight.tokens.append(token)
+                    flight.cond.notify_all()
+        except BaseException as e:
+            flight.finish(error=e)
+        else:
+            flight.finish(result="".join(flight.tokens))
+        finally:
+            self._forget(key, flight)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+def request_key(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
+
+
+single_flight = SingleFlight()
+
+
+def coalesced_call(key_parts, fn):
+    return single_flight.do(request_key(*key_parts), fn)
+
+
+def coalesced_stream(key_parts, stream_fn):
+    return single_flight.stream(request_key(*key_parts), stream_fn)
@@ -0,0 +1,70 @@
+import os
+import time
+import codecs
+
+# Streamlit re-sends the whole widget value on every update, so rendering each
+# token makes a long generation quadratic. The renderer buffers chunks and only
+# pushes the accumulated text on a time/size cadence, plus once at the end.
+FLUSH_INTERVAL = float(os.getenv("STREAM_RENDER_INTERVAL", "0.15"))
+FLUSH_CHARS = int(os.getenv("STREAM_RENDER_CHARS", "512"))
+
+
+class ThrottledRenderer:
+    def __init__(self, render, interval=FLUSH_INTERVAL, max_pending=FLUSH_CHARS):
+        self.render = render
+        self.interval = interval
+        self.max_pending = max_pending
+        self.flushes = 0
+        self._parts = []
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        # Raw byte chunks can split a multi-byte character; decode incrementally
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    @property
+    def text(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def feed(self, chunk):
+        if isinstance(chunk, (bytes, bytearray)):
+            chunk = self._decoder.decode(chunk)
+        if not chunk:
+            return
+        self._parts.append(chunk)
+        self._pending += len(chunk)
+        # The first chunk goes out immediately so the user sees the model respond
+        if (self.flushes == 0 or self._pending >= self.max_pending
+                or time.monotonic() - self._last_flush >= self.interval):
+            self.flush()
+
+    def flush(self):
+        self.render(self.text)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self.flushes += 1
+
+    def close(self) -> str:
+        """Final flush of anything still buffered; returns the full text."""
+        tail = self._decoder.decode(b"", final=True)
+        if tail:
+            self._parts.append(tail)
+            self._pending += len(tail)
+        if self._pending or self.flushes == 0:
+            self.flush()
+        return self.text
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def render_stream(stream, render, **kwargs) -> str:
+    """Feeds a token or byte-chunk iterator through a ThrottledRenderer and returns the full text."""
+    with ThrottledRenderer(render, **kwargs) as renderer:
+        for chunk in stream:
+            renderer.feed(chunk)
+    return renderer.text
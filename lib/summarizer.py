@@ -0,0 +1,85 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from lib.ollama_client import generate
+from lib.llm_cache import cached_call
+
+# Map-reduce summarization for memory logs that don't fit in one prompt.
+# Records are packed oldest-first into token-bounded chunks, so appending new
+# entries only changes the tail chunk; every other chunk summary is served from
+# the content-addressed LLM cache on later runs.
+CHARS_PER_TOKEN = 4
+MAP_PROMPT = (
+    "Summarize these agent memory log entries. Keep concrete facts: events, chains, "
+    "tools, errors and outcomes. Be concise.\n\n{text}"
+)
+REDUCE_PROMPT = (
+    "Combine these partial summaries of an agent memory log into one concise summary. "
+    "Keep concrete facts and drop repetition.\n\n{text}"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def chunk_texts(texts, max_tokens):
+    """Greedily packs texts, in order, into chunks of at most max_tokens."""
+    chunks, current, current_tokens = [], [], 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if tokens > max_tokens:
+            # A single oversized entry is split on its own.
+            if current:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            step = max_tokens * CHARS_PER_TOKEN
+            chunks.extend(text[i:i + step] for i in range(0, len(text), step))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _summarize(template, text, model, use_cache):
+    prompt = template.format(text=text)
+    return cached_call(
+        "ollama", model, 0, prompt,
+        lambda: generate(prompt, model=model, options={"temperature": 0}),
+        use_cache=use_cache
+    )
+
+
+def reduce_log(records, model="mistral", max_chunk_tokens=1500, workers=4, use_cache=True) -> str:
+    """
+    Condenses log records into a summary that fits in max_chunk_tokens.
+    Chunks are summarized in parallel, then summaries are merged level by level
+    until a single chunk remains.
+    """
+    texts = [r if isinstance(r, str) else json.dumps(r, default=str) for r in records]
+    if not texts:
+        return ""
+    chunks = chunk_texts(texts, max_chunk_tokens)
+    if len(chunks) == 1:
+        return chunks[0]
+
+    template = MAP_PROMPT
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while len(chunks) > 1:
+            summaries = list(pool.map(lambda c: _summarize(template, c, model, use_cache), chunks))
+            merged = chunk_texts(summaries, max_chunk_tokens)
+            if len(merged) >= len(chunks):
+                # Summaries aren't shrinking; merge pairwise so the reduction terminates.
+                merged = ["\n".join(summaries[i:i + 2]) for i in range(0, len(summaries), 2)]
+            chunks = merged
+            template = REDUCE_PROMPT
+    return chunks[0]
+
+
+def summarize_log(records, instruction, model="mistral", **kwargs) -> str:
+    condensed = reduce_log(records, model=model, **kwargs)
+    return generate(f"{instruction}\n\n{condensed}", model=model)
@@ -0,0 +1,114 @@
+from collections import defaultdict
+
+import pytest
+
+from lib import cascade
+from lib.cascade import cascade_generate, cascade_stats, infer_expect, score_answer, split_confidence
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(cascade, "CASCADE_STATS",
+                        {"requests": 0, "served_by": defaultdict(int), "escalations": defaultdict(int)})
+
+
+def answers(by_model):
+    """generate_fn stand-in returning a canned answer per model and recording the calls."""
+    calls = []
+
+    def generate_fn(prompt, model=None):
+        calls.append(model)
+        answer = by_model[model]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    generate_fn.calls = calls
+    return generate_fn
+
+
+def test_split_confidence():
+    assert split_confidence("Paris.\nCONFIDENCE: 85") == ("Paris.", 0.85)
+    assert split_confidence("Paris.\nconfidence: 250%") == ("Paris.", 1.0)
+    assert split_confidence("Paris.") == ("Paris.", None)
+
+
+def test_missing_confidence_is_below_threshold():
+    score, reasons = score_answer("A perfectly plausible answer.")
+    assert score < cascade.ACCEPT_THRESHOLD
+    assert "no confidence reported" in reasons
+
+
+def test_score_checks_expected_format():
+    assert score_answer("def f(:\n", expect="code", confidence=0.9)[0] == 0.0
+    assert score_answer("```python\ndef f():\n    return 1\n```", expect="code", confidence=0.9)[0] == 0.9
+    assert score_answer("{not json", expect="json", confidence=0.9)[0] == 0.0
+    assert score_answer("I'm not sure, maybe 4", confidence=0.9)[0] == pytest.approx(0.6)
+
+
+def test_accepts_confident_first_tier():
+    generate_fn = answers({"small": "It is 4.\nCONFIDENCE: 95", "large": "It is 4.\nCONFIDENCE: 99"})
+    result = cascade_generate("2+2?", tiers=["small", "large"], generate_fn=generate_fn)
+    assert result["model"] == "small"
+    assert result["output"] == "It is 4."
+    assert generate_fn.calls == ["small"]
+
+
+def test_escalates_without_confidence_line():
+    generate_fn = answers({"small": "It is 4.", "large": "It is 4.\nCONFIDENCE: 90"})
+    result = cascade_generate("2+2?", tiers=["small", "large"], generate_fn=generate_fn)
+    assert result["model"] == "large"
+    assert result["tier"] == 1
+    assert generate_fn.calls == ["small", "large"]
+    assert result["attempts"][0]["reasons"] == ["no confidence reported"]
+
+
+def test_escalates_on_broken_code_and_errors():
+    generate_fn = answers({
+        "tiny": RuntimeError("model not loaded"),
+        "small": "def f(:\nCONFIDENCE: 99",
+        "large": "def f():\n    return 1\nCONFIDENCE: 80",
+    })
+    result = cascade_generate("Write a function", tiers=["tiny", "small", "large"], expect="code",
+                              generate_fn=generate_fn)
+    assert result["model"] == "large"
+    assert result["attempts"][0] == {"model": "tiny", "error": "model not loaded"}
+    assert result["attempts"][1]["reasons"] == ["code does not parse"]
+
+
+def test_last_tier_is_always_accepted():
+    generate_fn = answers({"small": "hmm", "large": "I don't know"})
+    result = cascade_generate("?", tiers=["small", "large"], generate_fn=generate_fn)
+    assert result["model"] == "large"
+    assert result["score"] < cascade.ACCEPT_THRESHOLD
+
+
+def test_last_tier_error_is_raised():
+    generate_fn = answers({"small": "x", "large": RuntimeError("down")})
+    with pytest.raises(RuntimeError):
+        cascade_generate("?", tiers=["small", "large"], generate_fn=generate_fn)
+
+
+def test_empty_tiers_rejected():
+    with pytest.raises(ValueError):
+        cascade_generate("?", tiers=[], generate_fn=answers({}))
+
+
+def test_stats_counters():
+    generate_fn = answers({"small": "ok\nCONFIDENCE: 90", "large": "ok\nCONFIDENCE: 90"})
+    cascade_generate("a", tiers=["small", "large"], generate_fn=generate_fn)
+    generate_fn = answers({"small": "ok", "large": "ok\nCONFIDENCE: 90"})
+    cascade_generate("b", tiers=["small", "large"], generate_fn=generate_fn)
+    cascade_generate("c", tiers=["small", "large"], generate_fn=generate_fn)
+
+    stats = cascade_stats()
+    assert stats["requests"] == 3
+    assert stats["hit_rate"] == {"small": round(1 / 3, 3), "large": round(2 / 3, 3)}
+    assert stats["escalations"] == {"small": 2}
+
+
+def test_infer_expect():
+    assert infer_expect("Fix the bug in this loop") == "code"
+    assert infer_expect("Write a Python function that sorts a list") == "code"
+    assert infer_expect("Return JSON with the keys name and age") == "json"
+    assert infer_expect("Summarize this input: 10") is None
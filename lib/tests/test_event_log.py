@@ -0,0 +1,139 @@
+import io
+import json
+
+import pytest
+
+from lib.event_log import EventLog, iter_json_array, open_event_log
+
+
+def _segment_names(log):
+    return [path.name for path in log.files()]
+
+
+# --- iter_json_array ---
+
+def test_iter_json_array_across_chunk_boundaries():
+    items = [12345, {"a": [1, 2, {"b": "x,y]"}]}, "text, with ] brackets", 6.5, None, True]
+    text = json.dumps(items, indent=2)
+    # Tiny chunks split numbers, strings and nested objects across reads
+    for chunk_size in (1, 3, 7, len(text)):
+        assert list(iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == items
+
+
+def test_iter_json_array_number_at_end_of_chunk():
+    # "[1" then "23]": the 1 must not be emitted before the rest of the number arrives
+    assert list(iter_json_array(io.StringIO("[1" + "23]"), chunk_size=2)) == [123]
+    # "6." decodes as 6 on its own; it has to wait for the ".5"
+    assert list(iter_json_array(io.StringIO("[6.5, 1e3]"), chunk_size=3)) == [6.5, 1000.0]
+
+
+def test_iter_json_array_empty_and_whitespace():
+    assert list(iter_json_array(io.StringIO("  [ ]  "))) == []
+    assert list(iter_json_array(io.StringIO(""))) == []
+
+
+def test_iter_json_array_rejects_non_arrays():
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('{"event": "not a list"}')))
+
+
+def test_iter_json_array_unterminated():
+    items = iter_json_array(io.StringIO('[{"a": 1}, {"b": 2}'), chunk_size=4)
+    assert next(items) == {"a": 1}
+    with pytest.raises(ValueError):
+        list(items)
+
+
+# --- legacy migration ---
+
+def test_open_event_log_migrates_legacy_file(tmp_path):
+    legacy = tmp_path / "shared_memory.json"
+    events = [{"event": f"e{i}", "n": i} for i in range(5)]
+    legacy.write_text(json.dumps(events, indent=2), encoding="utf-8")
+
+    log = open_event_log(legacy)
+
+    assert list(log) == events
+    assert not legacy.exists()
+    assert (tmp_path / "shared_memory.json.migrated").exists()
+    assert log.directory == tmp_path / "shared_memory.events"
+    # Converted history comes before anything logged afterwards
+    log.append({"event": "after"})
+    assert [e["event"] for e in log][-2:] == ["e4", "after"]
+
+
+def test_import_legacy_runs_once(tmp_path):
+    legacy = tmp_path / "memory.json"
+    legacy.write_text(json.dumps([{"event": "old"}]), encoding="utf-8")
+    log = EventLog(tmp_path / "memory.events")
+
+    assert log.import_legacy(legacy) == 1
+    # The file was renamed, so a second attempt has nothing to convert
+    assert log.import_legacy(legacy) == 0
+
+    legacy.write_text(json.dumps([{"event": "again"}]), encoding="utf-8")
+    with pytest.raises(ValueError):
+        log.import_legacy(legacy)
+    assert legacy.exists()
+    assert list(log) == [{"event": "old"}]
+
+
+def test_import_legacy_leaves_bad_file_in_place(tmp_path):
+    legacy = tmp_path / "memory.json"
+    legacy.write_text('[{"event": "ok"}, {"event": ', encoding="utf-8")
+    log = EventLog(tmp_path / "memory.events")
+
+    with pytest.raises(ValueError):
+        log.import_legacy(legacy)
+    assert legacy.exists()
+    assert list(log) == []
+    assert not list(log.directory.glob("*.tmp"))
+
+
+# --- rotation and pruning ---
+
+def test_rotation_keeps_order(tmp_path):
+    log = EventLog(tmp_path / "log", segment_bytes=64)
+    entries = [{"n": i, "pad": "x" * 20} for i in range(20)]
+    for entry in entries:
+        log.append(entry)
+
+    names = _segment_names(log)
+    assert len(names) > 2
+    assert names[0] == "segment-000001.jsonl"
+    assert names == sorted(names)
+    assert list(log) == entries
+
+
+def test_pruning_drops_oldest_segments(tmp_path):
+    log = EventLog(tmp_path / "log", segment_bytes=1, max_segments=2)
+    for i in range(6):
+        log.append({"n": i})
+
+    # Every append rotates, so only the two newest segments survive
+    assert _segment_names(log) == ["segment-000005.jsonl", "segment-000006.jsonl"]
+    assert list(log) == [{"n": 4}, {"n": 5}]
+
+
+# --- tail ---
+
+def test_tail_spans_segments(tmp_path):
+    log = EventLog(tmp_path / "log", segment_bytes=40)
+    for i in range(12):
+        log.append({"n": i})
+
+    assert len(log.files()) > 2
+    assert log.tail(5) == [{"n": i} for i in range(7, 12)]
+    assert log.tail(100) == [{"n": i} for i in range(12)]
+    assert log.tail(0) == []
+
+
+def test_tail_skips_torn_lines(tmp_path):
+    log = EventLog(tmp_path / "log")
+    log.append({"n": 1})
+    with open(log.active, "a", encoding="utf-8") as f:
+        f.write('{"n": 2, "trunc\n')
+    log.append({"n": 3})
+
+    assert log.tail(2) == [{"n": 1}, {"n": 3}]
+    assert list(log) == [{"n": 1}, {"n": 3}]
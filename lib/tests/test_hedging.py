@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import defaultdict
+
+import pytest
+
+from lib import hedging
+from lib.hedging import HedgeError, StreamCancelled, hedged_stream_call
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(hedging, "HEDGE_STATS", {"requests": 0, "hedged": 0, "hedge_wins": 0,
+                                                 "wins": defaultdict(int), "failures": defaultdict(int)})
+
+
+def tokens(*values, delay=0.0):
+    def stream_fn(cancel):
+        for value in values:
+            time.sleep(delay)
+            yield value
+    return stream_fn
+
+
+def test_fast_primary_wins_without_hedging():
+    fired = []
+
+    def backup(cancel):
+        fired.append(1)
+        yield "backup"
+
+    assert hedged_stream_call([("local", tokens("he", "llo")), ("openai", backup)], hedge_after=1.0) == ("local", "hello")
+    assert fired == []
+    assert hedging.hedge_stats()["hedged"] == 0
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    primary_cancelled = threading.Event()
+
+    def stalled(cancel):
+        # A transport that honours cancel tears the request down before any token arrives
+        if cancel.wait(5):
+            primary_cancelled.set()
+            raise StreamCancelled()
+        yield "too late"
+
+    start = time.perf_counter()
+    winner = hedged_stream_call([("local", stalled), ("openai", tokens("fast"))], hedge_after=0.05)
+
+    assert winner == ("openai", "fast")
+    assert primary_cancelled.wait(1)
+    assert time.perf_counter() - start < 1
+    stats = hedging.hedge_stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1 and stats["wins"] == {"openai": 1}
+
+
+def test_loser_stops_reading_after_winner():
+    closed = threading.Event()
+
+    def slow(cancel):
+        try:
+            while True:
+                time.sleep(0.02)
+                yield "."
+        finally:
+            closed.set()
+
+    def quick_after_hedge(cancel):
+        yield "done"
+
+    # The primary's first token comes after the hedge threshold, so the backup is fired;
+    # the primary would stream forever, so it has to be closed once the backup wins
+    name, _ = hedged_stream_call([("slow", slow), ("quick", quick_after_hedge)], hedge_after=0.01)
+    assert name == "quick"
+    assert closed.wait(1)
+
+
+def test_failure_fires_next_candidate():
+    def broken(cancel):
+        raise ConnectionError("refused")
+        yield
+
+    assert hedged_stream_call([("local", broken), ("openai", tokens("ok"))], hedge_after=5) == ("openai", "ok")
+    assert hedging.hedge_stats()["failures"] == {"local": 1}
+
+
+def test_all_failing_raises():
+    def broken(cancel):
+        raise ConnectionError("refused")
+        yield
+
+    with pytest.raises(HedgeError, match="local: refused; openai: refused"):
+        hedged_stream_call([("local", broken), ("openai", broken)], hedge_after=5)
+
+
+def test_no_candidates():
+    with pytest.raises(HedgeError):
+        hedged_stream_call([])
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from lib.json_stream import StreamingJSONParser
+
+DOCUMENT = json.dumps({
+    "file": "app.py",
+    "score": -12.5e2,
+    "ok": True,
+    "suggestions": ["Use \"f-strings\"", "Escape \\ backslashes", "Unicode: café ✓", "Braces {in} [text]"],
+    "fixes": [
+        {"old": "print 'x'", "new": "print('x')"},
+        {"old": "a = [1, 2]", "new": "a = [1, 2, 3]", "meta": {"lines": [3, 4], "note": None}},
+        {"old": "\n\t", "new": ""},
+    ],
+    "nested": {"fixes": [{"old": "not", "new": "top-level"}]},
+    "count": 3,
+})
+EXPECTED = json.loads(DOCUMENT)
+
+
+def parse(chunks):
+    parser = StreamingJSONParser(("suggestions", "fixes"))
+    emitted = []
+    for chunk in chunks:
+        emitted.extend(parser.feed(chunk))
+    return parser, emitted
+
+
+def expected_items():
+    return [("suggestions", s) for s in EXPECTED["suggestions"]] + [("fixes", f) for f in EXPECTED["fixes"]]
+
+
+@pytest.mark.parametrize("offset", range(len(DOCUMENT) + 1))
+def test_split_at_every_offset(offset):
+    parser, emitted = parse([DOCUMENT[:offset], DOCUMENT[offset:]])
+    assert emitted == expected_items()
+    assert parser.result() == EXPECTED
+    assert parser.errors == 0
+
+
+def test_one_character_at_a_time_with_fence():
+    text = "Here you go:\n```json\n" + DOCUMENT + "\n```\ntrailing { noise"
+    parser, emitted = parse(text)
+    assert emitted == expected_items()
+    assert parser.result() == EXPECTED
+
+
+def test_items_are_emitted_as_they_close():
+    parser = StreamingJSONParser(("fixes",))
+    assert parser.feed('{"fixes": [{"old": "a", "new": "b"}') == [("fixes", {"old": "a", "new": "b"})]
+    assert parser.feed(', {"old": "c", ') == []
+    assert parser.feed('"new": "d"}]}') == [("fixes", {"old": "c", "new": "d"})]
+
+
+@pytest.mark.parametrize("cut", [10, len(DOCUMENT) // 2, len(DOCUMENT) - 1])
+def test_truncated_stream_keeps_complete_parts(cut):
+    parser, emitted = parse([DOCUMENT[:cut]])
+    result = parser.result()
+    assert result["truncated"] is True
+    complete = [(key, item) for key, item in expected_items() if (key, item) in emitted]
+    assert emitted == complete
+    assert result["fixes"] == [item for key, item in emitted if key == "fixes"]
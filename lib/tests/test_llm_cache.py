@@ -0,0 +1,38 @@
+import itertools
+
+import pytest
+
+from lib import llm_cache
+from lib.llm_cache import LLMCache, cached_call
+
+
+@pytest.fixture(autouse=True)
+def temp_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_cache, "CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_cache, "_cache", LLMCache(tmp_path))
+
+
+def counter():
+    values = itertools.count(1)
+    return lambda: f"answer {next(values)}"
+
+
+@pytest.mark.parametrize("temperature", [None, 0])
+def test_deterministic_requests_are_cached(temperature):
+    fn = counter()
+    first = cached_call("openai", "gpt-4", temperature, "prompt", fn)
+    assert cached_call("openai", "gpt-4", temperature, "prompt  \r\n", fn) == first
+
+
+def test_sampled_requests_are_not_cached():
+    fn = counter()
+    assert cached_call("openai", "gpt-4", 0.7, "prompt", fn) == "answer 1"
+    assert cached_call("openai", "gpt-4", 0.7, "prompt", fn) == "answer 2"
+
+
+def test_use_cache_false_and_refresh():
+    fn = counter()
+    assert cached_call("openai", "gpt-4", None, "prompt", fn) == "answer 1"
+    assert cached_call("openai", "gpt-4", None, "prompt", fn, use_cache=False) == "answer 2"
+    assert cached_call("openai", "gpt-4", None, "prompt", fn, refresh=True) == "answer 3"
+    assert cached_call("openai", "gpt-4", None, "prompt", fn) == "answer 3"
@@ -0,0 +1,111 @@
+import json
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from lib.memory_store import MemoryStore, _read_history, to_utc
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "memory.db"
+
+
+def test_wal_mode(db_path):
+    store = MemoryStore(db_path)
+    assert store._connect().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_concurrent_writers(db_path):
+    # Separate stores mean separate connections, like several Streamlit sessions or processes
+    stores = [MemoryStore(db_path) for _ in range(4)]
+    writers, per_writer = 8, 50
+    barrier = threading.Barrier(writers)
+    errors = []
+
+    def write(n):
+        store = stores[n % len(stores)]
+        barrier.wait()
+        try:
+            for i in range(per_writer):
+                store.record("command", {"writer": n, "i": i}, agent=f"agent-{n}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    reader = MemoryStore(db_path)
+    assert reader.count() == writers * per_writer
+    assert reader.count(agent="agent-3") == per_writer
+    assert [r["data"]["i"] for r in reader.query(agent="agent-3")] == list(range(per_writer))
+
+
+def test_reader_sees_writes_while_another_connection_writes(db_path):
+    writer, reader = MemoryStore(db_path), MemoryStore(db_path)
+    conn = writer._connect()
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("INSERT INTO memory (ts, event, payload) VALUES (?, 'pending', '{}')", (to_utc(None),))
+    # WAL readers aren't blocked by the open write transaction and don't see it yet
+    assert reader.count() == 0
+    conn.commit()
+    assert reader.count() == 1
+
+
+def test_timestamps_stored_as_utc(db_path):
+    store = MemoryStore(db_path)
+    store.record("a", timestamp="2025-07-01T12:00:00+02:00")
+    store.record("b", timestamp=datetime(2025, 7, 1, 11, 0, tzinfo=timezone.utc))
+    assert [r["timestamp"] for r in store.query()] == ["2025-07-01T10:00:00+00:00", "2025-07-01T11:00:00+00:00"]
+    assert [r["event"] for r in store.range("2025-07-01T10:30:00+00:00")] == ["b"]
+
+
+def test_verified_filter(db_path):
+    store = MemoryStore(db_path)
+    store.record("fix", {"verified": True}, agent="FredFix")
+    store.record("fix", {"verified": False}, agent="FredFix")
+    store.record("fix", {}, agent="FredFix")
+    assert [r["data"] for r in store.query(agent="FredFix", verified=True)] == [{"verified": True}]
+
+
+def test_import_legacy_json_array(db_path, tmp_path):
+    legacy = tmp_path / "shared_memory.json"
+    legacy.write_text(json.dumps([
+        {"timestamp": "2025-07-01T09:00:00+00:00", "event": "App started", "app": "GringoOpsHub", "data": "x"},
+        {"time": "2025-07-01T10:00:00+00:00", "agent": "FredFix", "session": "s1", "command": "hello"},
+        {"command": "no timestamp or agent"},
+        "a bare string",
+    ], indent=2), encoding="utf-8")
+    store = MemoryStore(db_path)
+
+    assert store.import_records(_read_history(legacy), agent="Imported", event="legacy") == 4
+
+    rows = store.query(agent="GringoOpsHub")
+    assert len(rows) == 1
+    assert rows[0]["event"] == "App started"
+    assert rows[0]["data"] == {"data": "x"}
+    fredfix = store.query(session="s1")[0]
+    assert (fredfix["agent"], fredfix["event"], fredfix["data"]) == ("FredFix", "legacy", {"command": "hello"})
+    assert store.count(agent="Imported") == 2
+    assert {"value": "a bare string"} in [r["data"] for r in store.query(agent="Imported")]
+
+
+def test_import_jsonl_skips_bad_lines(db_path, tmp_path):
+    history = tmp_path / "history.jsonl"
+    history.write_text('{"event": "one"}\nnot json\n\n{"event": "two"}\n', encoding="utf-8")
+    store = MemoryStore(db_path)
+    assert store.import_records(_read_history(history)) == 2
+    assert sorted(r["event"] for r in store.query()) == ["one", "two"]
+
+
+def test_delete_requires_a_filter(db_path):
+    store = MemoryStore(db_path)
+    store.record("a")
+    with pytest.raises(ValueError):
+        store.delete()
+    assert store.delete(event="a") == 1
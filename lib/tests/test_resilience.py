@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+
+from lib import resilience
+from lib.resilience import CircuitBreaker, CircuitOpenError, call_with_resilience
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+def opened(clock, threshold=2, reset=30):
+    breaker = CircuitBreaker(failure_threshold=threshold, reset_timeout=reset)
+    for _ in range(threshold):
+        breaker.record_failure()
+    assert breaker.state == "open"
+    return breaker
+
+
+def test_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert not breaker.available()
+
+
+def test_half_open_allows_one_probe(clock):
+    breaker = opened(clock)
+    clock.now += 30
+    assert breaker.state == "half_open"
+    assert breaker.available()
+    assert breaker.allow()
+    # Everyone else waits for the probe's outcome
+    assert not breaker.allow()
+    assert not breaker.available()
+
+
+def test_probe_success_closes(clock):
+    breaker = opened(clock)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert all(breaker.allow() for _ in range(5))
+
+
+def test_probe_failure_reopens(clock):
+    breaker = opened(clock)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    clock.now += 30
+    assert breaker.allow()
+
+
+def test_abandoned_probe_expires(clock):
+    breaker = opened(clock)
+    clock.now += 30
+    assert breaker.allow()
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_concurrent_callers_get_one_probe(clock):
+    breaker = opened(clock)
+    clock.now += 30
+    results = []
+    barrier = threading.Barrier(8)
+
+    def caller():
+        barrier.wait()
+        results.append(breaker.allow())
+
+    threads = [threading.Thread(target=caller) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(True) == 1
+
+
+def test_call_with_resilience_fails_fast_while_probing(clock, monkeypatch):
+    breaker = opened(clock)
+    clock.now += 30
+    monkeypatch.setattr(resilience, "_breakers", {"test": breaker})
+    assert breaker.allow()  # another caller holds the probe
+    with pytest.raises(CircuitOpenError):
+        call_with_resilience("test", lambda: "never called", max_retries=0)
+
+
+def test_non_transient_error_releases_probe(clock, monkeypatch):
+    breaker = opened(clock)
+    clock.now += 30
+    monkeypatch.setattr(resilience, "_breakers", {"test": breaker})
+
+    def bad_request():
+        raise ValueError("invalid model")
+
+    with pytest.raises(ValueError):
+        call_with_resilience("test", bad_request, max_retries=0)
+    assert breaker.state == "half_open"
+    assert call_with_resilience("test", lambda: "ok", max_retries=0) == "ok"
+    assert breaker.state == "closed"
@@ -0,0 +1,114 @@
+import threading
+
+import pytest
+
+from lib.single_flight import SingleFlight
+
+
+def test_do_runs_once_for_concurrent_callers():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "answer"
+
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", fn)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", fn))) for _ in range(3)]
+    for t in followers:
+        t.start()
+    release.set()
+    for t in [leader] + followers:
+        t.join(5)
+
+    assert calls == [1]
+    assert results == ["answer"] * 4
+    assert flight.in_flight() == 0
+
+
+def test_do_error_reaches_every_waiter():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def fn():
+        started.set()
+        release.wait(5)
+        raise ValueError("upstream failed")
+
+    def call():
+        try:
+            flight.do("k", fn)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    started.wait(5)
+    threads += [threading.Thread(target=call) for _ in range(2)]
+    for t in threads[1:]:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert errors == ["upstream failed"] * 3
+    # The failed flight is forgotten, so the next call retries
+    assert flight.do("k", lambda: "retried") == "retried"
+
+
+def test_late_joiner_replays_prefix_then_follows_live():
+    flight = SingleFlight()
+    resume = threading.Event()
+    calls = []
+
+    def stream_fn():
+        calls.append(1)
+        yield "a"
+        yield "b"
+        resume.wait(5)
+        yield "c"
+
+    first = flight.stream("k", stream_fn)
+    assert [next(first), next(first)] == ["a", "b"]
+
+    late = flight.stream("k", lambda: pytest.fail("a second upstream stream was opened"))
+    late_tokens = [next(late), next(late)]
+    resume.set()
+    late_tokens += list(late)
+
+    assert late_tokens == ["a", "b", "c"]
+    assert list(first) == ["c"]
+    assert calls == [1]
+
+
+def test_stream_error_reaches_every_follower():
+    flight = SingleFlight()
+    fail = threading.Event()
+
+    def stream_fn():
+        yield "partial"
+        fail.wait(5)
+        raise ConnectionError("stream dropped")
+
+    first = flight.stream("k", stream_fn)
+    assert next(first) == "partial"
+    late = flight.stream("k", stream_fn)
+    assert next(late) == "partial"
+    fail.set()
+
+    for follower in (first, late):
+        with pytest.raises(ConnectionError):
+            next(follower)
+    assert flight.in_flight() == 0
+
+
+def test_different_keys_do_not_share():
+    flight = SingleFlight()
+    assert list(flight.stream("a", lambda: iter(["1"]))) == ["1"]
+    assert list(flight.stream("b", lambda: iter(["2"]))) == ["2"]
@@ -0,0 +1,82 @@
+import pytest
+
+from lib import warm_pool
+from lib.warm_pool import WarmPool
+
+
+class FakeClient:
+    def __init__(self, loaded=()):
+        self.loaded = set(loaded)
+        self.loads = []
+        self.ps_calls = 0
+
+    def running_models(self):
+        self.ps_calls += 1
+        return list(self.loaded)
+
+    def load(self, model, keep_alive=None):
+        self.loads.append((model, keep_alive))
+        if keep_alive == 0:
+            self.loaded.discard(model)
+        else:
+            self.loaded.add(model)
+
+    def unload(self, model):
+        self.load(model, keep_alive=0)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(warm_pool, "free_memory_mb", lambda: None)
+    pool = WarmPool(["mistral"], keep_alive="30m")
+    pool.client = FakeClient()
+    return pool
+
+
+def test_ping_skips_models_ollama_evicted(pool):
+    pool.warm("mistral")
+    pool.warm("phi")
+    pool.client.loaded.discard("phi")  # evicted by Ollama itself
+    pool.client.loads.clear()
+
+    pool._ping()
+
+    assert pool.client.loads == [("mistral", "30m")]
+    assert list(pool._warm) == ["mistral"]
+
+
+def test_status_is_cached(pool, monkeypatch):
+    pool.client.loaded = {"mistral"}
+    assert pool.status() == {"mistral": True}
+    pool.client.loaded = set()
+    assert pool.status() == {"mistral": True}
+    assert pool.client.ps_calls == 1
+
+    monkeypatch.setattr(pool, "_status", (0.0, pool._status[1]))
+    monkeypatch.setattr(warm_pool.time, "monotonic", lambda: 10 ** 6)
+    assert pool.status() == {"mistral": False}
+
+
+def test_status_includes_used_models(pool):
+    pool.touch("codellama")
+    pool.client.loaded = {"codellama"}
+    assert pool.status() == {"mistral": False, "codellama": True}
+
+
+def test_evicts_lru_after_a_load_fills_memory(pool, monkeypatch):
+    free = iter([5000, 1000, 5000])  # enough before loading phi, short after it
+    monkeypatch.setattr(warm_pool, "free_memory_mb", lambda: next(free))
+    pool.min_free_mb = 2048
+    pool._warm["mistral"] = 0
+    pool.client.loaded = {"mistral"}
+
+    pool.warm("phi")
+
+    assert "phi" in pool._warm
+    assert "mistral" not in pool._warm
+    assert ("mistral", 0) in pool.client.loads
+
+
+def test_module_touch_without_a_pool(monkeypatch):
+    monkeypatch.setattr(warm_pool, "_pool", None)
+    warm_pool.touch("mistral")  # no pool yet: nothing to do, no error
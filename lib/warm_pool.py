@@ -0,0 +1,156 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from lib.ollama_client import get_client
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Keeps the dashboard's local models resident in Ollama so the first prompt to
+# each one doesn't pay the cold-load penalty. Models are preloaded at startup,
+# pinged before their keep-alive runs out, and evicted least-recently-used
+# first when free RAM drops below OLLAMA_MIN_FREE_MB. Only models Ollama still
+# has loaded are pinged: one it evicted itself (OLLAMA_MAX_LOADED_MODELS) is
+# dropped from the pool instead of being cold-loaded again every interval.
+WARM_KEEP_ALIVE = os.getenv("OLLAMA_WARM_KEEP_ALIVE", "30m")
+PING_INTERVAL = float(os.getenv("OLLAMA_WARM_PING_INTERVAL", "300"))
+MIN_FREE_MB = int(os.getenv("OLLAMA_MIN_FREE_MB", "2048"))
+STATUS_TTL = float(os.getenv("OLLAMA_WARM_STATUS_TTL", "5"))
+
+
+def free_memory_mb():
+    if psutil is None:
+        return None
+    return psutil.virtual_memory().available / (1024 * 1024)
+
+
+class WarmPool:
+    def __init__(self, models, keep_alive=WARM_KEEP_ALIVE, ping_interval=PING_INTERVAL, min_free_mb=MIN_FREE_MB):
+        self.models = list(models)
+        self.keep_alive = keep_alive
+        self.ping_interval = ping_interval
+        self.min_free_mb = min_free_mb
+        self.client = get_client()
+        self._warm = OrderedDict()  # model -> last use, least recently used first
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._status = (0.0, None)  # (fetched at, loaded models) from /api/ps
+
+    def start(self):
+        """Preloads the configured models and keeps them warm on a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        for model in self.models:
+            if self._stop.is_set():
+                return
+            self.warm(model)
+        while not self._stop.wait(self.ping_interval):
+            self._ping()
+
+    def warm(self, model) -> bool:
+        self._make_room()
+        try:
+            self.client.load(model, keep_alive=self.keep_alive)
+        except Exception as e:
+            print(f"[WarmPool] Could not preload {model}: {e}")
+            return False
+        self.touch(model)
+        # The load itself may have pushed free RAM under the floor
+        self._make_room(keep=model)
+        return True
+
+    def touch(self, model):
+        """Marks a model as just used so it's the last to be evicted."""
+        with self._lock:
+            self._warm[model] = time.time()
+            self._warm.move_to_end(model)
+
+    def evict(self, model):
+        try:
+            self.client.unload(model)
+        except Exception as e:
+            print(f"[WarmPool] Could not unload {model}: {e}")
+        with self._lock:
+            self._warm.pop(model, None)
+
+    def _make_room(self, keep=None):
+        free = free_memory_mb()
+        while free is not None and free < self.min_free_mb:
+            with self._lock:
+                victim = next((m for m in self._warm if m != keep), None)
+            if victim is None:
+                return
+            print(f"[WarmPool] {free:.0f} MB free, evicting {victim}")
+            self.evict(victim)
+            free = free_memory_mb()
+
+    def _ping(self):
+        self._make_room()
+        try:
+            loaded = self._loaded(max_age=0)
+        except Exception as e:
+            print(f"[WarmPool] Could not list loaded models: {e}")
+            return
+        with self._lock:
+            models = list(self._warm)
+        for model in models:
+            if model not in loaded:
+                # Ollama evicted it; it comes back when it is used again
+                with self._lock:
+                    self._warm.pop(model, None)
+                continue
+            try:
+                self.client.load(model, keep_alive=self.keep_alive)
+            except Exception as e:
+                print(f"[WarmPool] Keep-alive ping failed for {model}: {e}")
+
+    def _loaded(self, max_age=STATUS_TTL) -> set:
+        """Models Ollama has loaded, from /api/ps at most max_age seconds old."""
+        fetched, loaded = self._status
+        if loaded is None or time.monotonic() - fetched > max_age:
+            loaded = set(self.client.running_models())
+            self._status = (time.monotonic(), loaded)
+        return loaded
+
+    def status(self) -> dict:
+        """Maps each configured or recently used model to True if Ollama currently has it loaded."""
+        with self._lock:
+            models = list(dict.fromkeys(self.models + list(self._warm)))
+        try:
+            loaded = self._loaded()
+        except Exception:
+            with self._lock:
+                loaded = set(self._warm)
+        return {model: model in loaded for model in models}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def touch(model):
+    """Records a use of model in the process-wide pool, if one has been started."""
+    if _pool is not None and model:
+        _pool.touch(model)
+
+
+def get_warm_pool(models) -> WarmPool:
+    """Returns the process-wide warm pool, starting it on first call."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WarmPool(models)
+            _pool.start()
+    return _pool
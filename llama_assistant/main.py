@@ -1,7 +1,19 @@
 import subprocess
 import os
+import re
+import sys
+import codecs
 import argparse
 from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # Adds GringoOps root to PYTHONPATH
+from llama_assistant.server import get_server
+from lib.cassette import cassette_call, cassette_stream
+
+# Send prompts to a resident llama-server instead of reloading the model per call.
+LLAMA_USE_SERVER = os.getenv("LLAMA_USE_SERVER", "1") == "1"
+# Generation stops as soon as a code block closes; an explicit end marker overrides that.
+LLAMA_END_MARKER = os.getenv("LLAMA_END_MARKER")
+CODE_BLOCK_MARKERS = [("\\begin{code}", "\\end{code}"), ("```", "```")]
 
 PROMPT_TEMPLATE = """\
 ### Instruction:
@@ -22,8 +34,21 @@ def load_prompt_template(prompt_path):
         return f.read()
 
 def run_llama(prompt):
-    llama_bin = "/Users/fredtaylor/Projects/llama.cpp/build/bin/llama-cli"
+    if LLAMA_USE_SERVER:
+        try:
+            server = get_server(os.getenv("LLAMA_MODEL_PATH"), ctx_size=256, threads=2)
+            return server.complete(prompt, temperature=0.7, top_k=30)
+        except Exception as e:
+            print(f"[WARN] llama-server unavailable ({e}), falling back to llama-cli")
+    return run_llama_cli(prompt)
+
+def run_llama_cli(prompt):
     model_path = os.getenv("LLAMA_MODEL_PATH")
+    return cassette_call("llama-cli", {"model": os.path.basename(model_path or ""), "prompt": prompt},
+                         lambda: _run_llama_cli(prompt, model_path))
+
+def _run_llama_cli(prompt, model_path):
+    llama_bin = "/Users/fredtaylor/Projects/llama.cpp/build/bin/llama-cli"
 
     if not os.path.exists(llama_bin):
         print(f"Llama binary not found at {llama_bin}")
@@ -57,7 +82,129 @@ def run_llama(prompt):
         print("stderr:\n", e.stderr)
         return "Error during LLaMA execution."
 
-def assist(instruction, code_file, prompt_template=None, output_file=None):
+def stream_llama(prompt, stop=None):
+    if LLAMA_USE_SERVER:
+        stream = None
+        try:
+            server = get_server(os.getenv("LLAMA_MODEL_PATH"), ctx_size=256, threads=2)
+            stream = server.stream(prompt, temperature=0.7, top_k=30, stop=stop)
+            first = next(stream, None)
+        except Exception as e:
+            print(f"[WARN] llama-server unavailable ({e}), falling back to llama-cli")
+            stream = None
+        if stream is not None:
+            if first is not None:
+                yield first
+            yield from stream
+            return
+    yield from stream_llama_cli(prompt)
+
+def stream_llama_cli(prompt):
+    model_path = os.getenv("LLAMA_MODEL_PATH")
+    return cassette_stream("llama-cli", {"model": os.path.basename(model_path or ""), "prompt": prompt, "stream": True},
+                           lambda: _stream_llama_cli(prompt, model_path))
+
+def _stream_llama_cli(prompt, model_path):
+    llama_bin = "/Users/fredtaylor/Projects/llama.cpp/build/bin/llama-cli"
+    if not os.path.exists(llama_bin):
+        print(f"Llama binary not found at {llama_bin}")
+        yield "Llama binary not found."
+        return
+    if not model_path or not os.path.exists(model_path):
+        print("LLAMA_MODEL_PATH is not set or the file doesn't exist.")
+        yield "Model path not set or not found."
+        return
+
+    process = subprocess.Popen(
+        [
+            llama_bin,
+            "-m", model_path,
+            "--ctx-size", "256",
+            "--threads", "2",
+            "--temp", "0.7",
+            "--top-k", "30",
+            "--no-display-prompt",
+            "-p", prompt
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        while True:
+            data = os.read(process.stdout.fileno(), 256)
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text:
+                yield text
+    finally:
+        # Kills llama-cli if the caller stopped reading early
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        process.stdout.close()
+    if process.returncode:
+        print(f"[ERROR] LLaMA exited with status {process.returncode}")
+
+class CodeBlockExtractor:
+    """Watches streamed text and reports when the first code block (or end marker) is complete."""
+
+    def __init__(self, end_marker=None, markers=CODE_BLOCK_MARKERS):
+        self.end_marker = end_marker
+        self.markers = markers
+        self.text = ""
+        self.done = False
+        self._block = None  # (end marker, index where the code starts)
+        self._scanned = 0
+
+    def feed(self, chunk) -> bool:
+        self.text += chunk
+        # Only rescan the new text, plus enough overlap to catch a marker split across chunks
+        if self.end_marker:
+            if self.text.find(self.end_marker, max(0, self._scanned - len(self.end_marker))) != -1:
+                self.done = True
+        else:
+            if self._block is None:
+                found = [(self.text.find(start, max(0, self._scanned - len(start))), start, end)
+                         for start, end in self.markers]
+                found = [f for f in found if f[0] != -1]
+                if found:
+                    index, start, end = min(found)
+                    self._block = (end, index + len(start))
+            if self._block is not None:
+                end, code_start = self._block
+                if self.text.find(end, max(code_start, self._scanned - len(end))) != -1:
+                    self.done = True
+        self._scanned = len(self.text)
+        return self.done
+
+    def result(self) -> str:
+        if self.end_marker:
+            return self.text.split(self.end_marker, 1)[0].strip()
+        if self._block is None:
+            return self.text.strip()
+        end, code_start = self._block
+        code = self.text[code_start:].split(end, 1)[0]
+        # Drop a language tag such as ```python
+        first_line, newline, rest = code.partition("\n")
+        if newline and re.fullmatch(r"[\w+-]*", first_line.strip()):
+            code = rest
+        return code.strip()
+
+def generate_code_block(prompt, end_marker=LLAMA_END_MARKER):
+    """Streams a completion and stops generating as soon as the code block is complete."""
+    extractor = CodeBlockExtractor(end_marker)
+    stream = stream_llama(prompt, stop=[end_marker] if end_marker else None)
+    try:
+        for chunk in stream:
+            if extractor.feed(chunk):
+                break
+    finally:
+        stream.close()
+    return extractor.result()
+
+def assist(instruction, code_file, prompt_template=None, output_file=None, end_marker=LLAMA_END_MARKER):
     if not os.path.isfile(code_file):
         print(f"[ERROR] Code file '{code_file}' not found.")
         return
@@ -68,15 +215,7 @@ def assist(instruction, code_file, prompt_template=None, output_file=None):
         template = PROMPT_TEMPLATE
 
     prompt = template.format(instruction=instruction, code=code)
-    response = run_llama(prompt)
-
-    # Extract code from response if formatted in a code block
-    import re
-    code_match = re.search(r"\\begin{code}(.*?)\\end{code}", response, re.DOTALL)
-    if code_match:
-        cleaned_response = code_match.group(1).strip()
-    else:
-        cleaned_response = response.strip()
+    cleaned_response = generate_code_block(prompt, end_marker=end_marker)
 
     if output_file:
         with open(output_file, 'w') as f:
@@ -95,10 +234,12 @@ def main():
     parser.add_argument("--instruction", help="Instruction to apply", required=True)
     parser.add_argument("--prompt", help="Path to custom prompt template")
     parser.add_argument("--output", help="Path to save output (default: outputs/output.txt)", default="outputs/output.txt")
+    parser.add_argument("--end-marker", help="Stop generating at this marker instead of at the end of the first code block",
+                        default=LLAMA_END_MARKER)
 
     args = parser.parse_args()
     Path("outputs").mkdir(exist_ok=True)
-    assist(args.instruction, args.code, args.prompt, args.output)
+    assist(args.instruction, args.code, args.prompt, args.output, end_marker=args.end_marker)
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,11 @@
 import sys
 import subprocess
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # Adds GringoOps root to PYTHONPATH
+from llama_assistant.server import get_server
+from lib.cassette import cassette_call
+
+MODEL_PATH = "/Users/fredtaylor/models/CodeLLaMA/codellama-7b-instruct.Q4_K_M.gguf"
 
 def load_prompt(prompt_path, code_snippet):
     with open(prompt_path, 'r') as f:
@@ -7,13 +13,19 @@ def load_prompt(prompt_path, code_snippet):
     return template.replace("{{code}}", code_snippet)
 
 def run_llama(prompt_text):
+    try:
+        # Resident server keeps the GGUF loaded between runs
+        print(get_server(MODEL_PATH, ctx_size=4096).complete(prompt_text))
+        return
+    except Exception as e:
+        print(f"[WARN] llama-server unavailable ({e}), falling back to llama-cli")
     cmd = [
         "/Users/fredtaylor/Projects/llama.cpp/build/bin/llama-cli",
-        "-m", "/Users/fredtaylor/models/CodeLLaMA/codellama-7b-instruct.Q4_K_M.gguf",
+        "-m", MODEL_PATH,
         "-p", prompt_text
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    print(result.stdout)
+    print(cassette_call("llama-cli", {"model": Path(MODEL_PATH).name, "prompt": prompt_text},
+                        lambda: subprocess.run(cmd, capture_output=True, text=True).stdout))
 
 if __name__ == "__main__":
     prompt_file = sys.argv[1]  # e.g., prompts/fix_python_code.txt
@@ -0,0 +1,251 @@
+import os
+import json
+import time
+import hashlib
+import atexit
+import threading
+import sys
+import subprocess
+import requests
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # Adds GringoOps root to PYTHONPATH
+from lib.llm_metrics import track_call, track_stream
+from lib.cassette import cassette_call, cassette_stream
+
+# Resident llama.cpp inference backend.
+# `llama-cli` reloads the GGUF on every call; `llama-server` loads it once and
+# then answers /completion requests over a local HTTP socket.
+LLAMA_SERVER_BIN = os.getenv("LLAMA_SERVER_BIN", "/Users/fredtaylor/Projects/llama.cpp/build/bin/llama-server")
+LLAMA_SERVER_HOST = os.getenv("LLAMA_SERVER_HOST", "127.0.0.1")
+# Unless LLAMA_SERVER_PORT pins one, each (model, ctx size) gets its own port in
+# [LLAMA_SERVER_BASE_PORT, +LLAMA_SERVER_PORT_RANGE), so differently configured
+# callers never share a resident server.
+LLAMA_SERVER_PORT = int(os.getenv("LLAMA_SERVER_PORT")) if os.getenv("LLAMA_SERVER_PORT") else None
+LLAMA_SERVER_BASE_PORT = int(os.getenv("LLAMA_SERVER_BASE_PORT", "8089"))
+LLAMA_SERVER_PORT_RANGE = int(os.getenv("LLAMA_SERVER_PORT_RANGE", "200"))
+LLAMA_SERVER_LOG = os.getenv("LLAMA_SERVER_LOG", "outputs/llama_server.log")
+# Leave the server running after this process exits so the next CLI call finds the model loaded.
+LLAMA_SERVER_PERSIST = os.getenv("LLAMA_SERVER_PERSIST", "1") == "1"
+
+
+class LlamaServerError(RuntimeError):
+    pass
+
+
+def server_port(model_path, ctx_size) -> int:
+    if LLAMA_SERVER_PORT is not None:
+        return LLAMA_SERVER_PORT
+    key = f"{os.path.realpath(model_path or '')}|{ctx_size}".encode("utf-8")
+    return LLAMA_SERVER_BASE_PORT + int(hashlib.sha256(key).hexdigest(), 16) % LLAMA_SERVER_PORT_RANGE
+
+
+class LlamaServer:
+    def __init__(self, model_path, binary=LLAMA_SERVER_BIN, host=LLAMA_SERVER_HOST, port=None,
+                 ctx_size=256, threads=2, startup_timeout=180, request_timeout=600):
+        self.model_path = model_path
+        self.binary = binary
+        self.host = host
+        self.port = port or server_port(model_path, ctx_size)
+        self.ctx_size = ctx_size
+        self.threads = threads
+        self.startup_timeout = startup_timeout
+        self.request_timeout = request_timeout
+        self.base_url = f"http://{host}:{self.port}"
+        self.process = None
+        self.restarts = 0
+        self.session = requests.Session()
+        self._lock = threading.Lock()
+
+    def start(self):
+        if not os.path.exists(self.binary):
+            raise LlamaServerError(f"llama-server binary not found at {self.binary}")
+        if not self.model_path or not os.path.exists(self.model_path):
+            raise LlamaServerError("LLAMA_MODEL_PATH is not set or the file doesn't exist.")
+
+        os.makedirs(os.path.dirname(LLAMA_SERVER_LOG) or ".", exist_ok=True)
+        log_file = open(LLAMA_SERVER_LOG, "a")
+        print(f"[INFO] Starting llama-server on {self.base_url} (model: {self.model_path})")
+        self.process = subprocess.Popen(
+            [
+                self.binary,
+                "-m", self.model_path,
+                "--host", self.host,
+                "--port", str(self.port),
+                "--ctx-size", str(self.ctx_size),
+                "--threads", str(self.threads),
+            ],
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            start_new_session=LLAMA_SERVER_PERSIST,
+        )
+        log_file.close()
+        self._wait_until_healthy()
+
+    def _wait_until_healthy(self):
+        deadline = time.time() + self.startup_timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise LlamaServerError(f"llama-server exited during startup (code {self.process.returncode}), see {LLAMA_SERVER_LOG}")
+            if self.healthy():
+                print("[INFO] llama-server is ready")
+                return
+            time.sleep(0.5)
+        self.stop()
+        raise LlamaServerError(f"llama-server did not become healthy within {self.startup_timeout}s")
+
+    def healthy(self) -> bool:
+        # /health answers 503 while the model is still loading.
+        try:
+            response = self.session.get(f"{self.base_url}/health", timeout=2)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def running_config(self):
+        """Model path and context size reported by the server's /props, or None."""
+        try:
+            props = self.session.get(f"{self.base_url}/props", timeout=2).json()
+        except (requests.RequestException, ValueError):
+            return None
+        settings = props.get("default_generation_settings") or {}
+        return {
+            "model": props.get("model_path") or settings.get("model"),
+            "n_ctx": settings.get("n_ctx"),
+            "slots": props.get("total_slots") or 1,
+        }
+
+    def matches(self, config) -> bool:
+        if not config or not config["model"]:
+            return False
+        model = config["model"]
+        if os.path.isabs(model):
+            same_model = os.path.realpath(model) == os.path.realpath(self.model_path)
+        else:
+            same_model = os.path.basename(model) == os.path.basename(self.model_path)
+        # n_ctx is per slot; --ctx-size is shared across all slots
+        n_ctx = config["n_ctx"]
+        same_ctx = n_ctx is None or self.ctx_size in (n_ctx, n_ctx * config["slots"])
+        return same_model and same_ctx
+
+    def ensure_running(self):
+        with self._lock:
+            if self.process is not None and self.process.poll() is None and self.healthy():
+                return
+            if self.process is None and self.healthy():
+                # A server left resident by an earlier run is only reused if it
+                # was started with this model and context size.
+                config = self.running_config()
+                if self.matches(config):
+                    return
+                raise LlamaServerError(
+                    f"{self.base_url} is serving {config or 'an unknown model'}, not {self.model_path} "
+                    f"with ctx {self.ctx_size}; stop it or set LLAMA_SERVER_PORT"
+                )
+            if self.process is not None:
+                print("[WARN] llama-server is not healthy, restarting")
+                self.stop()
+                self.restarts += 1
+            self.start()
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+    def _payload(self, prompt, n_predict, temperature, top_k, **params) -> dict:
+        payload = {
+            "prompt": prompt,
+            "n_predict": n_predict,
+            "temperature": temperature,
+            "top_k": top_k,
+            # Reuse the KV cache for the longest matching prompt prefix
+            "cache_prompt": True,
+        }
+        payload.update({k: v for k, v in params.items() if v is not None})
+        return payload
+
+    def complete(self, prompt, n_predict=-1, temperature=0.7, top_k=30, **params) -> str:
+        """Send a prompt to the resident model and return the generated text."""
+        payload = self._payload(prompt, n_predict, temperature, top_k, **params)
+        model_name = os.path.basename(self.model_path)
+        with track_call("llama.cpp", model_name, prompt) as call:
+            data = cassette_call("llama.cpp", {"model": model_name, **payload}, lambda: self._request(payload))
+            call["completion"] = data.get("content", "")
+            call["prompt_tokens"] = data.get("tokens_evaluated", call["prompt_tokens"])
+            call["completion_tokens"] = data.get("tokens_predicted")
+        return call["completion"]
+
+    def _request(self, payload) -> dict:
+        for attempt in range(2):
+            self.ensure_running()
+            try:
+                response = self.session.post(f"{self.base_url}/completion", json=payload, timeout=self.request_timeout)
+                response.raise_for_status()
+                return response.json()
+            except requests.ConnectionError:
+                # The server died mid-request; restart it once and retry.
+                if attempt:
+                    raise
+                self.stop()
+        raise LlamaServerError("llama-server request failed")
+
+    def stream(self, prompt, n_predict=-1, temperature=0.7, top_k=30, stop=None, **params):
+        """
+        Yield generated text as the server produces it.
+        Closing the generator drops the connection, which makes llama-server stop generating.
+        """
+        payload = self._payload(prompt, n_predict, temperature, top_k, stop=stop, stream=True, **params)
+        model_name = os.path.basename(self.model_path)
+        return track_stream("llama.cpp", model_name, prompt,
+                            cassette_stream("llama.cpp", {"model": model_name, **payload}, lambda: self._stream(payload)))
+
+    def _stream(self, payload):
+        self.ensure_running()
+        try:
+            response = self.session.post(f"{self.base_url}/completion", json=payload,
+                                         timeout=self.request_timeout, stream=True)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise LlamaServerError(f"llama-server request failed: {e}") from e
+        try:
+            for line in response.iter_lines():
+                # Server-sent events: "data: {...}"
+                if not line.startswith(b"data: "):
+                    continue
+                chunk = json.loads(line[len(b"data: "):])
+                if chunk.get("content"):
+                    yield chunk["content"]
+                if chunk.get("stop"):
+                    break
+        finally:
+            response.close()
+
+
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+def get_server(model_path, **kwargs) -> LlamaServer:
+    """Returns the resident server for a model, starting it on first use."""
+    key = (model_path, kwargs.get("ctx_size", 256))
+    with _servers_lock:
+        server = _servers.get(key)
+        if server is None:
+            server = LlamaServer(model_path, **kwargs)
+            _servers[key] = server
+    server.ensure_running()
+    return server
+
+
+@atexit.register
+def _shutdown_servers():
+    if LLAMA_SERVER_PERSIST:
+        return
+    for server in _servers.values():
+        server.stop()
@@ -0,0 +1,59 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from llama_assistant import server as llama_server
+from llama_assistant.server import LlamaServer
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        status = 200 if self.path == "/health" else 404
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@pytest.fixture
+def health_server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _HealthHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_derived_port_is_used_in_base_url():
+    server = LlamaServer("/models/example.gguf", ctx_size=4096)
+    assert server.port == llama_server.server_port("/models/example.gguf", 4096)
+    assert server.base_url == f"http://127.0.0.1:{server.port}"
+
+
+def test_different_ctx_sizes_get_their_own_port():
+    small = LlamaServer("/models/example.gguf", ctx_size=256)
+    large = LlamaServer("/models/example.gguf", ctx_size=4096)
+    assert small.base_url != large.base_url
+
+
+def test_healthy_without_explicit_port(monkeypatch, health_server):
+    monkeypatch.setattr(llama_server, "LLAMA_SERVER_PORT", health_server)
+    server = LlamaServer("/models/example.gguf")
+    assert server.base_url == f"http://127.0.0.1:{health_server}"
+    assert server.healthy()
+
+
+def test_not_healthy_when_nothing_listens():
+    server = LlamaServer("/models/example.gguf", port=_free_port())
+    assert not server.healthy()
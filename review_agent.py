@@ -1,21 +1,41 @@
-import os
-from openai import OpenAI
+from lib.llm_cache import cached_call
+from lib.llm_metrics import track_call
+from lib.cassette import cassette_call
+from lib.clients import get_openai_client
+from lib.ast_chunker import should_chunk, review_chunks
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def review_prompt(prompt, use_cache=True):
+    def request():
+        response = get_openai_client().chat.completions.create(
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": "You are a professional Python code reviewer."},
+                {"role": "user", "content": prompt}
+            ]
+        )
+        return response.choices[0].message.content
 
-def review_file(filepath):
+    def call_model():
+        with track_call("openai", "gpt-4", prompt) as call:
+            call["completion"] = cassette_call("openai", {"model": "gpt-4", "prompt": prompt}, request)
+        return call["completion"]
+
+    # Unchanged files (and unchanged chunks) hit the cache instead of being re-reviewed
+    return cached_call("openai", "gpt-4", None, prompt, call_model, use_cache=use_cache)
+
+def review_file(filepath, use_cache=True, chunked=None):
     with open(filepath, 'r') as f:
         code = f.read()
 
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": "You are a professional Python code reviewer."},
-            {"role": "user", "content": f"Review this code:\n\n{code}"}
-        ]
-    )
-
-    print(response.choices[0].message.content)
+    # Large files are split at top-level defs/classes and reviewed in parallel
+    if chunked is None:
+        chunked = should_chunk(code)
+    if chunked:
+        review = review_chunks(code, lambda p: review_prompt(f"Review this code:\n\n{p}", use_cache), path=filepath)
+    else:
+        review = review_prompt(f"Review this code:\n\n{code}", use_cache)
+    print(review)
+    return review
 
 if __name__ == "__main__":
     review_file("FredFix/core/agent.py")
@@ -2,12 +2,21 @@ import os
 import subprocess
 import argparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import json  # Add to imports
+import re
+from lib.ollama_client import generate
+from lib.event_log import open_event_log
 
 CLEANER = "Agent/agent.py"  # Path to your cleaning agent
 ROOT_DIR = os.getcwd()      # Current project root
 TARGET_EXT = ".py"          # Files to scan
 SKIP_DIRS = {".venv", "__pycache__", "CompletedTasks", "UnresolvedTasks"}  # Ignore these
+CHARS_PER_TOKEN = 4
+BATCH_PROMPT = """You are a Python code cleaner. Clean up each file below: fix obvious bugs, remove dead code, and tidy formatting.
+Return every file in the same format, starting with its ### FILE: line and ending with ### END FILE, in the same order.
+
+{files}"""
+FILE_BLOCK = "### FILE: {path}\n{code}\n### END FILE"
+FILE_PATTERN = re.compile(r"### FILE: (.+?)\n(.*?)\n### END FILE", re.DOTALL)
 
 
 def collect_python_files(max_files=None):
@@ -45,6 +54,65 @@ def clean_with_agent(filepath, dry_run=False):
         print(f"❌ Failed to clean {filepath}: {e}")
 
 
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def pack_batches(filepaths, token_budget):
+    """
+    Groups files into batches whose combined size fits the token budget.
+    Files too large to share a request are returned separately to be cleaned alone.
+    """
+    # Half the budget goes to the files, half is left for the cleaned copies coming back.
+    overhead = estimate_tokens(BATCH_PROMPT)
+    batches, current, current_tokens, oversized = [], [], overhead, []
+    for path in filepaths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                tokens = estimate_tokens(f.read()) + estimate_tokens(path) + 8
+        except Exception:
+            oversized.append(path)
+            continue
+        if overhead + tokens > token_budget // 2:
+            oversized.append(path)
+            continue
+        if current and current_tokens + tokens > token_budget // 2:
+            batches.append(current)
+            current, current_tokens = [], overhead
+        current.append(path)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches, oversized
+
+
+def clean_batch_with_model(filepaths, model="mistral", dry_run=False):
+    print(f"\n📦 Cleaning batch of {len(filepaths)} files: {', '.join(os.path.basename(p) for p in filepaths)}")
+    if dry_run:
+        return
+    blocks = []
+    for path in filepaths:
+        with open(path, "r", encoding="utf-8") as f:
+            blocks.append(FILE_BLOCK.format(path=path, code=f.read().rstrip("\n")))
+    try:
+        response = generate(BATCH_PROMPT.format(files="\n\n".join(blocks)), model=model)
+    except Exception as e:
+        print(f"❌ Batch request failed, cleaning files one by one: {e}")
+        for path in filepaths:
+            clean_with_agent(path)
+        return
+
+    outputs = {path.strip(): code for path, code in FILE_PATTERN.findall(response)}
+    for path in filepaths:
+        if path in outputs:
+            print(f"✅ Cleaned: {path}")
+            log_to_memory(path, outputs[path])
+        else:
+            # The model dropped or mangled this file; give it a request of its own.
+            print(f"⚠️ {path} missing from batch response, cleaning alone")
+            clean_with_agent(path)
+
+
 def listen_to_agent_loop():
     print("👂 Listening to agent loop...")
     try:
@@ -66,16 +134,7 @@ def log_to_memory(filename, output):
     }
 
     try:
-        if os.path.exists(memory_path):
-            with open(memory_path, "r") as f:
-                memory_data = json.load(f)
-        else:
-            memory_data = []
-
-        memory_data.append(log_entry)
-
-        with open(memory_path, "w") as f:
-            json.dump(memory_data, f, indent=2)
+        open_event_log(memory_path).append(log_entry)
     except Exception as e:
         print(f"❌ Failed to log memory: {e}")
 
@@ -85,6 +144,9 @@ if __name__ == "__main__":
     parser.add_argument("--dry-run", action="store_true", help="List files but don't clean.")
     parser.add_argument("--max-files", type=int, help="Limit number of files to clean.")
     parser.add_argument("--workers", type=int, default=4, help="Parallel jobs (default: 4)")
+    parser.add_argument("--batch", action="store_true", help="Pack small files into shared model requests.")
+    parser.add_argument("--batch-tokens", type=int, default=4096, help="Token budget per batched request (default: 4096)")
+    parser.add_argument("--model", default="mistral", help="Local model used in batch mode (default: mistral)")
     args = parser.parse_args()
 
     print("🚀 Scanning project for Python files...")
@@ -92,7 +154,13 @@ if __name__ == "__main__":
     print(f"✅ Found {len(py_files)} Python files.")
 
     with ThreadPoolExecutor(max_workers=args.workers) as executor:
-        futures = [executor.submit(clean_with_agent, f, args.dry_run) for f in py_files]
+        if args.batch:
+            batches, oversized = pack_batches(py_files, args.batch_tokens)
+            print(f"📦 {len(batches)} batches, {len(oversized)} files cleaned alone.")
+            futures = [executor.submit(clean_batch_with_model, b, args.model, args.dry_run) for b in batches]
+            futures += [executor.submit(clean_with_agent, f, args.dry_run) for f in oversized]
+        else:
+            futures = [executor.submit(clean_with_agent, f, args.dry_run) for f in py_files]
         for future in as_completed(futures):
             _ = future.result()
 
@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Load generator for the FredFix agent paths against tools/fake_ollama.py.
+# Reports throughput, latency percentiles and the per-request time spent outside
+# the (simulated) model: memory rewrites, object construction, queueing, etc.
+#
+#   python tools/bench_agent.py --requests 200 --concurrency 8 --latency 0.05 --tps 200
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))  # Adds GringoOps root to PYTHONPATH
+from tools.fake_ollama import FakeOllamaServer
+
+DEFAULT_CHAIN = [
+    {"name": "Summarize", "prompt": "Summarize this input: {input}"},
+    {"name": "Improve", "prompt": "Based on that summary, suggest improvements."},
+    {"name": "Plan", "prompt": "Turn the improvements into a short task list."},
+]
+MISSION_PREFIX = "[PROJECT MISSION CONTEXT]\n" + json.dumps({"mission": "Benchmark the FredFix agent pipeline."})
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def build_scenarios(model, chain_steps):
+    # Imported here so OLLAMA_HOST points at the fake server before the client reads it
+    from FredFix.core.agent import FredFixAgent, run_agent
+
+    shared_agent = FredFixAgent()
+
+    def agent_method(i):
+        return shared_agent.run_agent(f"bench request {i}: explain list comprehensions", model=model, use_cache=False)
+
+    def agent_function(i):
+        return run_agent(f"bench request {i}: explain list comprehensions", model=model, use_cache=False)
+
+    def chain(i):
+        # Mirrors the dashboard chain runner: sequential steps sharing the mission prefix
+        output = None
+        for step in chain_steps:
+            prompt = step["prompt"].replace("{input}", f"bench chain {i}")
+            output = run_agent(f"{prompt} (run {i})", model=step.get("model", model), use_cache=False,
+                               prefix=MISSION_PREFIX)
+        return output
+
+    return {"FredFixAgent.run_agent": agent_method, "run_agent": agent_function, "chain": chain}
+
+
+def run_load(fn, requests, concurrency):
+    latencies = []
+    errors = 0
+    first_error = None
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            result = fn(i)
+        except Exception as e:
+            # One failed request is a data point, not the end of the run
+            result = {"mode": "error", "output": f"{type(e).__name__}: {e}"}
+        return time.perf_counter() - start, result
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, result in pool.map(one, range(requests)):
+            latencies.append(latency)
+            if isinstance(result, dict) and result.get("mode") == "error":
+                errors += 1
+                first_error = first_error or result.get("output")
+    return latencies, errors, time.perf_counter() - wall_start, first_error
+
+
+def report(name, latencies, errors, wall, model_time, first_error=None):
+    n = len(latencies)
+    overhead = (sum(latencies) - model_time) / n if n else 0.0
+    return {
+        "scenario": name,
+        "requests": n,
+        "errors": errors,
+        "first_error": first_error,
+        "throughput_rps": round(n / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "model_ms_per_request": round(model_time / n * 1000, 1) if n else 0.0,
+        "overhead_ms_per_request": round(overhead * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FredFix agent paths against a fake Ollama server")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake model first-token latency (s)")
+    parser.add_argument("--tps", type=float, default=200.0, help="Fake model tokens per second")
+    parser.add_argument("--tokens", type=int, default=32, help="Tokens per fake response")
+    parser.add_argument("--model", default="mistral")
+    parser.add_argument("--chain", help="Chain JSON file to drive instead of the built-in 3-step chain")
+    parser.add_argument("--scenario", action="append", help="Only run the named scenario(s)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(latency=args.latency, tokens_per_sec=args.tps, response_tokens=args.tokens)
+    os.environ["OLLAMA_HOST"] = server.start()
+    os.environ.setdefault("GRINGO_LLM_CACHE", "0")
+    # Keep benchmark rows out of the user's memory store and metrics log; both
+    # paths are read when the agent is imported in build_scenarios
+    scratch = tempfile.mkdtemp(prefix="bench_agent_")
+    os.environ["GRINGO_MEMORY_DB"] = os.path.join(scratch, "memory.db")
+    os.environ["LLM_METRICS_JSONL"] = os.path.join(scratch, "llm_metrics.jsonl")
+
+    chain_steps = DEFAULT_CHAIN
+    if args.chain:
+        with open(args.chain, "r") as f:
+            chain_steps = [s for s in json.load(f) if "prompt" in s]
+
+    # The agent rewrites its memory file on every call; restore it afterwards
+    memory_file = ROOT / "FredFix" / "core" / "agent_memory.json"
+    memory_backup = memory_file.read_bytes() if memory_file.exists() else None
+
+    results = []
+    try:
+        for name, fn in build_scenarios(args.model, chain_steps).items():
+            if args.scenario and name not in args.scenario:
+                continue
+            server.reset()
+            latencies, errors, wall, first_error = run_load(fn, args.requests, args.concurrency)
+            results.append(report(name, latencies, errors, wall, sum(server.model_times), first_error))
+    finally:
+        server.stop()
+        if memory_backup is not None:
+            memory_file.write_bytes(memory_backup)
+        elif memory_file.exists():
+            memory_file.unlink()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"\n📊 {args.requests} requests, concurrency {args.concurrency}, "
+          f"fake model {args.latency * 1000:.0f} ms + {args.tokens} tokens @ {args.tps:.0f} tok/s")
+    for r in results:
+        print(f"\n▶️ {r['scenario']}")
+        print(f"   throughput {r['throughput_rps']} req/s, errors {r['errors']}")
+        if r["first_error"]:
+            print(f"   first error: {r['first_error'][:200]}")
+        print(f"   latency p50 {r['p50_ms']} ms | p95 {r['p95_ms']} ms | p99 {r['p99_ms']} ms")
+        print(f"   model {r['model_ms_per_request']} ms/request, outside the model {r['overhead_ms_per_request']} ms/request")
+
+
+if __name__ == "__main__":
+    main()
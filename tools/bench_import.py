@@ -0,0 +1,68 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+# Startup benchmark: imports a module in fresh interpreters and fails if the median
+# import time exceeds the budget or if any provider SDK was loaded eagerly.
+#
+#   python tools/bench_import.py                      # lib.llm_router, default budget
+#   python tools/bench_import.py --budget-ms 100 --runs 7
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MODULE = "lib.llm_router"
+DEFAULT_BUDGET_MS = float(os.getenv("LLM_ROUTER_IMPORT_BUDGET_MS", "150"))
+LAZY_MODULES = ["openai", "google.generativeai", "google.api_core", "voicestrip", "httpx", "requests"]
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, runs):
+    samples = []
+    loaded = set()
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, lazy=LAZY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+        data = json.loads(result.stdout.strip().splitlines()[-1])
+        samples.append(data["ms"])
+        loaded.update(data["loaded"])
+    return sorted(samples), sorted(loaded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assert an import-time budget for a module")
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples, loaded = measure(args.module, args.runs)
+    median = samples[len(samples) // 2]
+    print(f"⏱ import {args.module}: median {median:.1f} ms (min {samples[0]:.1f}, max {samples[-1]:.1f}) "
+          f"over {args.runs} runs, budget {args.budget_ms:.0f} ms")
+
+    failed = False
+    if loaded:
+        print(f"❌ Loaded at import time (should be lazy): {', '.join(loaded)}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"❌ Over budget by {median - args.budget_ms:.1f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("✅ Within budget")
+
+
+if __name__ == "__main__":
+    main()
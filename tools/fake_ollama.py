@@ -0,0 +1,145 @@
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Stand-in for the Ollama HTTP API with a configurable first-token latency and
+# tokens/sec, so agent pipelines can be load-tested without real inference.
+# Every request's simulated model time is recorded, which lets the benchmark
+# separate time spent in our own code from time spent "in the model".
+DEFAULT_LATENCY = 0.05
+DEFAULT_TOKENS_PER_SEC = 200.0
+DEFAULT_RESPONSE_TOKENS = 32
+
+
+class FakeOllamaServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=DEFAULT_LATENCY,
+                 tokens_per_sec=DEFAULT_TOKENS_PER_SEC, response_tokens=DEFAULT_RESPONSE_TOKENS):
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.response_tokens = response_tokens
+        self.model_times = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def record(self, seconds):
+        with self._lock:
+            self.model_times.append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.model_times = []
+
+    def tokens(self, prompt, num_predict=None):
+        count = self.response_tokens if num_predict in (None, -1) else min(num_predict, self.response_tokens)
+        return [f"tok{i} " for i in range(count)]
+
+
+def _handler_for(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, body, status=200):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _write_chunk(self, data):
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send_json({"models": [{"name": "mistral:latest"}]})
+            elif self.path == "/api/ps":
+                self._send_json({"models": []})
+            else:
+                self._send_json({"error": "not found"}, status=404)
+
+        def do_POST(self):
+            if self.path != "/api/generate":
+                self._send_json({"error": "not found"}, status=404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            prompt = payload.get("prompt", "")
+            if not prompt:
+                # Load / keep-alive request
+                self._send_json({"model": payload.get("model"), "response": "", "done": True})
+                return
+
+            start = time.perf_counter()
+            tokens = server.tokens(prompt, (payload.get("options") or {}).get("num_predict"))
+            prompt_tokens = len(prompt) // 4 + 1
+            final = {
+                "model": payload.get("model"),
+                "done": True,
+                "prompt_eval_count": prompt_tokens,
+                "eval_count": len(tokens),
+                "context": list(range(prompt_tokens + len(tokens))),
+            }
+            time.sleep(server.latency)
+
+            if payload.get("stream", True):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for token in tokens:
+                        time.sleep(1 / server.tokens_per_sec)
+                        self._write_chunk((json.dumps({"response": token, "done": False}) + "\n").encode("utf-8"))
+                    self._write_chunk((json.dumps({"response": "", **final}) + "\n").encode("utf-8"))
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    return  # client hung up, e.g. a cancelled hedge
+            else:
+                time.sleep(len(tokens) / server.tokens_per_sec)
+                self._send_json({"response": "".join(tokens), **final})
+            server.record(time.perf_counter() - start)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama API server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="Seconds before the first token")
+    parser.add_argument("--tps", type=float, default=DEFAULT_TOKENS_PER_SEC, help="Generated tokens per second")
+    parser.add_argument("--tokens", type=int, default=DEFAULT_RESPONSE_TOKENS, help="Tokens per response")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(args.host, args.port, args.latency, args.tps, args.tokens)
+    print(f"🧪 Fake Ollama listening on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 import streamlit as st
 import os
 import time
-import openai
 import difflib
 import shutil
 from FredFix.core.CreatorAgent import CreatorAgent
@@ -9,6 +8,9 @@ from tools import openai_review
 from plugins.autopatch import autopatch_run
 from FredFix.wizard.wizard_logic import generate_code, review_file, apply_patch
 from FredFix.wizard.wizard_state import load_history, save_history, save_prompt_log, load_analytics_logs
+from lib.stream_render import render_stream
+from lib.clients import get_openai_client
+from lib.llm_metrics import track_stream
 import pdfkit
 
 st.set_page_config(page_title="GringoOps AI Wizard", layout="wide")
@@ -162,10 +164,9 @@ with tab4:
     chat_prompt = st.text_input("Ask a question (e.g. 'How do I use FastAPI with SQLite?')")
 
     if chat_prompt:
-        full_response = ""
         response_area = st.empty()
         with st.spinner("Thinking..."):
-            response = openai.ChatCompletion.create(
+            response = get_openai_client().chat.completions.create(
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "You are a senior Python assistant for GringoOps."},
@@ -173,12 +174,13 @@ with tab4:
                 ],
                 stream=True
             )
-            for chunk in response:
-                if "choices" in chunk:
-                    delta = chunk["choices"][0]["delta"]
-                    if "content" in delta:
-                        full_response += delta["content"]
-                        response_area.text_area("💬 Assistant Response (streaming)", full_response, height=300)
+            deltas = track_stream("openai", "gpt-4", chat_prompt, (
+                chunk.choices[0].delta.content for chunk in response if chunk.choices and chunk.choices[0].delta.content
+            ))
+            # Redraw on a throttled cadence rather than once per delta
+            full_response = render_stream(
+                deltas, lambda text: response_area.text_area("💬 Assistant Response (streaming)", text, height=300)
+            )
         if st.button("💾 Save Chat"):
             with open("logs/assistant_log.txt", "a", encoding="utf-8") as f:
                 f.write(f"User: {chat_prompt}\nAssistant: {full_response}\n\n")